@@ -17,6 +17,7 @@ class UserToContextMiddleware(BaseMiddleware):
     ) -> Any:
         db_con = DbConnector()
         user = data["event_from_user"]
+        # Also keeps the stored username in sync with Telegram
         data["user"] = await db_con.get_or_create_user(user.id, user.username)
         process = False
         if event.chat.type == "private":
@@ -26,17 +27,3 @@ class UserToContextMiddleware(BaseMiddleware):
         if process:
             return await handler(event, data)
 
-
-class UpdateUsernameMiddleware(BaseMiddleware):
-    async def __call__(
-        self,
-        handler: Callable[[Message, Dict[str, Any]], Awaitable[Any]],
-        event: Message,
-        data: Dict[str, Any],
-    ) -> Any:
-        user = data["user"]
-        from_user = data["event_from_user"]
-        if user.username != from_user.username:
-            user.username = from_user.username
-            await DbConnector().update_user(user)
-        return await handler(event, data)
@@ -4,6 +4,7 @@ from aiogram.filters import CommandStart
 from aiogram.fsm.context import FSMContext
 
 from database.connector import DbConnector
+from database.user_cache import CachedUser
 from configuration import ua_config
 
 from bot.utils.eth_accounts import WalletManager
@@ -13,7 +14,7 @@ balance_router = Router()
 
 
 @balance_router.message(F.text == ua_config.get("main_menu", "wallet"))
-async def wallet_text_handler(message: Message, state: FSMContext) -> None:
+async def wallet_text_handler(message: Message, state: FSMContext, user: CachedUser) -> None:
     await state.clear()
-    text = await generate_initial_message(message.from_user.id)
+    text = await generate_initial_message(user)
     await message.reply(text=text)
@@ -5,6 +5,7 @@ from aiogram.fsm.state import State, StatesGroup
 
 from configuration import ua_config
 
+from bot.services.contact_cache import contact_cache
 from bot.utils.message_generator import generate_contacts
 from bot.utils.keyboards import MainKeyboards
 from database.connector import DbConnector
@@ -50,6 +51,7 @@ async def process_contact_wallet(message: Message, state: FSMContext) -> None:
         contact_name=contact_name,
         wallet_address=wallet_address,
     )
+    await contact_cache.invalidate(message.from_user.id)
 
     await state.clear()
     text = await generate_contacts(message.from_user.id)
@@ -1,17 +1,31 @@
+import asyncio
+from decimal import Decimal
+from typing import List
+
 from aiogram import Router, F
 from aiogram.fsm.state import StatesGroup, State
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 
-from bot.utils.ai_helper import transcribe_audio, understand_action
+from bot.utils.ai_helper import understand_action
 from database.connector import DbConnector
-from configuration import ua_config
+from configuration import ua_config, DEPOSIT_FEE_TIMEOUT
+from database.user_cache import CachedUser
 
-from bot.utils.eth_accounts import WalletManager
+from bot.services.key_cache import key_cache
+from bot.services.transcription import transcriber
 from bot.utils.message_generator import generate_initial_message
 from bot.utils.keyboards import MainKeyboards
+from bot.utils.progress import ProgressMessage
 from bot.utils.eth_connector import ETHConnector
-from bot.utils.intmax_connector import IntMaxConnector
+from bot.services.intmax_sessions import intmax_sessions
+from bot.services.balances import balance_service, ETHEREUM, INTMAX
+from bot.services.tx_watcher import tx_watcher
+from bot.services.transfer_batcher import transfer_batcher
+from bot.services.withdrawal_claimer import withdrawal_claimer
+from bot.services.token_registry import token_registry, parse_amount
+from bot.utils.intent_parser import split_recipients
+from bot.services.deposit_fees import deposit_fees
 
 everything_else_router = Router()
 
@@ -22,158 +36,153 @@ class EverythingElseStates(StatesGroup):
     withdraw_confirmation = State()
 
 
-async def make_deposit(amount: float, telegram_id: int):
+async def make_deposit(amount: Decimal, symbol: str, telegram_id: int):
     db_con = DbConnector()
     user = await db_con.get_user(telegram_id=telegram_id)
-    private_key = WalletManager.load_private_key(user.keystore)
-    async with IntMaxConnector() as connector:
-        await connector.login(f'0x{private_key}')
-        res = await connector.deposit(amount=amount, 
-            token={
-                "tokenIndex": 0,
-                "symbol": 'ETH',
-                "decimals": 18,
-                "contractAddress": '0x0000000000000000000000000000000000000000',
-                "createdAt": { "_seconds": 1748082445, "_nanoseconds": 385000000 },
-                "tokenType": 0
-            }
-        )
+    private_key = await key_cache.load_private_key(user.keystore)
+    async with intmax_sessions.session(f'0x{private_key}') as connector:
+        token = await token_registry.resolve(symbol, connector)
+        res = await connector.deposit(amount=token.wire_number(amount), token=token.raw)
+    await balance_service.invalidate(user.wallet_address)
+    await tx_watcher.watch(telegram_id, ETHEREUM, res['result']['txHash'], 'deposit', user.wallet_address)
     return res['result']['status'], res['result']['txHash']
 
 
-async def make_withdraw(amount: float, telegram_id: int):
-    db_con = DbConnector()
-    print('hey1')
-    user = await db_con.get_user(telegram_id=telegram_id)
-    private_key = WalletManager.load_private_key(user.keystore)
-    async with IntMaxConnector() as connector:
-        await connector.login(f'0x{private_key}')
-        print('hey')
-        res = await connector.withdraw(amount=amount,
-            token={
-                "tokenIndex": 0,
-                "symbol": 'ETH',
-                "decimals": 18,
-                "contractAddress": '0x0000000000000000000000000000000000000000',
-                "createdAt": { "_seconds": 1748082445, "_nanoseconds": 385000000 },
-                "tokenType": 0
-            },
-            address=user.wallet_address
-        )
-    return res['tx']['txTreeRoot']
-
-
-async def make_withdraw(amount: float, telegram_id: int):
+async def make_withdraw(amount: Decimal, symbol: str, telegram_id: int):
     db_con = DbConnector()
     user = await db_con.get_user(telegram_id=telegram_id)
-    private_key = WalletManager.load_private_key(user.keystore)
-    async with IntMaxConnector() as connector:
-        await connector.login(f'0x{private_key}')
-        res = await connector.withdraw(amount=amount,
-            token={
-                "tokenIndex": 0,
-                "symbol": 'ETH',
-                "decimals": 18,
-                "contractAddress": '0x0000000000000000000000000000000000000000',
-                "createdAt": { "_seconds": 1748082445, "_nanoseconds": 385000000 },
-                "tokenType": 0
-            },
-            address=user.wallet_address
+    private_key = await key_cache.load_private_key(user.keystore)
+    async with intmax_sessions.session(f'0x{private_key}') as connector:
+        token = await token_registry.resolve(symbol, connector)
+        res = await connector.withdraw(
+            amount=token.wire_number(amount), token=token.raw, address=user.wallet_address
         )
+    await balance_service.invalidate(user.wallet_address)
+    await tx_watcher.watch(telegram_id, INTMAX, res['tx']['txTreeRoot'], 'withdrawal', user.wallet_address)
+    await withdrawal_claimer.track(telegram_id)
     return res['tx']['txTreeRoot']
 
 
-async def make_transfer(amount: float, telegram_id: int, address: str):
+async def make_transfer(amount: Decimal, symbol: str, telegram_id: int, addresses: List[str]) -> List[str]:
     db_con = DbConnector()
     user = await db_con.get_user(telegram_id=telegram_id)
-    private_key = WalletManager.load_private_key(user.keystore)
-    transfers = [{
-        'address': address,
-        'amount': amount,
-        'token': {
-            "tokenIndex": 0,
-            "symbol": 'ETH',
-            "decimals": 18,
-            "contractAddress": '0x0000000000000000000000000000000000000000',
-            "createdAt": { "_seconds": 1748082445, "_nanoseconds": 385000000 },
-            "tokenType": 0
-        }
-    }]
-    async with IntMaxConnector() as connector:
-        await connector.login(f'0x{private_key}')
-        res = await connector.broadcast_transaction(transfers=transfers)
-    return res['tx']['txTreeRoot']
+    private_key = await key_cache.load_private_key(user.keystore)
+    async with intmax_sessions.session(f'0x{private_key}') as connector:
+        token = await token_registry.resolve(symbol, connector)
+    wire_amount = token.wire_amount(amount)
+    if len(addresses) == 1:
+        return [await transfer_batcher.submit(user, addresses[0], wire_amount, token.raw)]
+    return await transfer_batcher.submit_many(user, [(address, wire_amount) for address in addresses], token.raw)
 
 
 @everything_else_router.message(F.voice)
-async def voice_handler(message: Message, state: FSMContext) -> None:
+async def voice_handler(message: Message, state: FSMContext, user: CachedUser) -> None:
     await state.clear()
-    file = await message.bot.download(message.voice.file_id)
-    transcribed_text = await transcribe_audio(file, message.chat.id)
-    action, username, address, amount, network = await understand_action(transcribed_text, message.chat.id)
-    if amount == "ERROR":
-        await message.reply(
-            ua_config.get('main', 'invalid_amount')
+    progress = await ProgressMessage.send(message, ua_config.get('main', 'processing'))
+
+    async def show_fields(fields: dict) -> None:
+        await progress.update(ua_config.get('main', 'intent_progress').format(
+            fields='\n'.join(f"{name.replace('_', ' ').capitalize()}: {value}" for name, value in fields.items())
+        ))
+
+    transcribed_text = await transcriber.transcribe(message.bot, message.voice, message.chat.id)
+    if not transcribed_text.strip():
+        await progress.finish(text=ua_config.get('main', 'invalid_action'))
+        return
+    action, username, address, amount, network = await understand_action(
+        transcribed_text, message.chat.id, on_progress=show_fields
+    )
+    try:
+        value, symbol = parse_amount(amount)
+    except ValueError:
+        await progress.finish(
+            text=ua_config.get('main', 'invalid_amount')
         )
         return
+    amount = f'{value:f} {symbol}'
     
     if action == "DEPOSIT":
+        # The fee is estimated while the confirmation is on screen and added to it when ready
+        fee_quote = asyncio.ensure_future(deposit_fees.quote(user, value, symbol))
         await state.set_state(EverythingElseStates.deposit_confirmation)
-        if 'eth' not in amount.lower():
-            amount += ' ETH'
         await state.update_data(amount=amount)
         await state.update_data(network=network)
-        await message.reply(
-            text=ua_config.get('transactions', 'deposit_confirm').format(amount=amount),
+        fee = await fee_quote if deposit_fees.cached_gas(symbol, value) is not None else None
+        if fee is None:
+            await progress.finish(
+                text=ua_config.get('transactions', 'deposit_confirm').format(amount=amount),
+                reply_markup=MainKeyboards.yes_no_keyboard()
+            )
+            try:
+                fee = await asyncio.wait_for(fee_quote, DEPOSIT_FEE_TIMEOUT)
+            except asyncio.TimeoutError:
+                return
+            # Leave the message alone if the user has already answered
+            if fee is None or await state.get_state() != EverythingElseStates.deposit_confirmation.state:
+                return
+        await progress.finish(
+            text=ua_config.get('transactions', 'deposit_confirm_fee').format(amount=amount, fee=f'{fee:.6f}'),
             reply_markup=MainKeyboards.yes_no_keyboard()
         )
         return
 
     if action == "WITHDRAW":
         await state.set_state(EverythingElseStates.withdraw_confirmation)
-        if 'eth' not in amount.lower():
-            amount += ' ETH'
         await state.update_data(amount=amount)
         await state.update_data(network=network)
-        await message.reply(
+        await progress.finish(
             text=ua_config.get('transactions', 'withdraw_confirm').format(amount=amount),
             reply_markup=MainKeyboards.yes_no_keyboard()
         )
         return
 
     if action == "ERROR":
-        await message.reply(
-            ua_config.get('main', 'invalid_action')
+        await progress.finish(
+            text=ua_config.get('main', 'invalid_action')
         )
         return
     if username == "ERROR" or address == "ERROR":
-        await message.reply(
-            ua_config.get('main', 'invalid_receiver')
+        await progress.finish(
+            text=ua_config.get('main', 'invalid_receiver')
         )
         return
 
     if action == 'TRANSFER':
+        try:
+            recipients = split_recipients(username, address)
+        except ValueError:
+            await progress.finish(
+                text=ua_config.get('main', 'invalid_receiver')
+            )
+            return
         await state.set_state(EverythingElseStates.transaction_confirmation)
-        await state.update_data(amount=amount, address=address, network=network)
-        await message.reply(
-            ua_config.get('transactions', 'transfer').format(
+        await state.update_data(amount=amount, address=address, network=network, username=username)
+        if len(recipients) > 1:
+            text = ua_config.get('transactions', 'transfer_many').format(
+                amount=amount,
+                addresses='\n'.join(f'{recipient.address} ({recipient.name})' for recipient in recipients),
+                network=network
+            )
+        else:
+            text = ua_config.get('transactions', 'transfer').format(
                 amount=amount,
                 address=f'{address} ({username})',
                 network=network
-            ),
-            reply_markup=MainKeyboards.yes_no_keyboard()
-        )
+            )
+        await progress.finish(text=text, reply_markup=MainKeyboards.yes_no_keyboard())
         return
 
-    await message.reply(
+    await progress.finish(
         text=ua_config.get('main', 'invalid_action')
     )
 
 
 @everything_else_router.callback_query(EverythingElseStates.transaction_confirmation)
 async def transaction_confirmation_handler(callback: CallbackQuery, state: FSMContext) -> None:
+    data = await state.get_data()
+    # Leaving the confirmation state before anything is sent turns a second press into a no-op
+    await state.clear()
     if callback.data == 'no':
-        await state.clear()
         await callback.message.bot.edit_message_text(
             message_id=callback.message.message_id,
             chat_id=callback.message.chat.id,
@@ -185,56 +194,66 @@ async def transaction_confirmation_handler(callback: CallbackQuery, state: FSMCo
         chat_id=callback.message.chat.id,
         text=ua_config.get('main', 'processing')
     )
-    data = await state.get_data()
-    amount = float(data.get('amount').split(' ')[0])
     network = data.get('network')
-    address = data.get('address')
-    if network.lower() == 'intmax':
+    addresses = [recipient.address for recipient in split_recipients(data.get('username'), data.get('address'))]
+    if network.lower() == INTMAX:
         try:
-            txid = await make_transfer(amount, callback.message.chat.id, address=address)
+            amount, symbol = parse_amount(data.get('amount'))
+            txids = await make_transfer(amount, symbol, callback.message.chat.id, addresses=addresses)
         except Exception as e:
-            await state.clear()
             await callback.message.bot.edit_message_text(
                 message_id=callback.message.message_id,
                 chat_id=callback.message.chat.id,
                 text=ua_config.get('transactions', 'problems_with_transactions').format(error=e)
             )
             return
-        await state.clear()
         await callback.message.bot.edit_message_text(
             message_id=callback.message.message_id,
             chat_id=callback.message.chat.id,
-            text=ua_config.get('transactions', 'success_transaction_intmax').format(txid=txid),
-            reply_markup=MainKeyboards.blockchain_explorer_button(txid=txid)
+            text=ua_config.get('transactions', 'success_transaction_intmax').format(txid='\n'.join(txids)),
+            reply_markup=MainKeyboards.blockchain_explorer_button(txid=txids[-1])
         )
+        return
 
     db_con = DbConnector()
     user = await db_con.get_user(telegram_id=callback.message.chat.id)
-    private_key = WalletManager.load_private_key(user.keystore)
+    private_key = await key_cache.load_private_key(user.keystore)
     eth_con = ETHConnector(private_key_hex=private_key)
+    sent = []
     try:
-        res = await eth_con.send_native(to_address=address, amount=amount)
+        amount, symbol = parse_amount(data.get('amount'))
+        if symbol != 'ETH':
+            raise ValueError(f'only ETH can be sent on Ethereum, not {symbol}')
+        # Nonces are allocated locally, so the sends do not wait for each other to be mined
+        for address in addresses:
+            res = await eth_con.send_native(to_address=address, amount=amount)
+            sent.append(res)
+            await tx_watcher.watch(
+                callback.message.chat.id, ETHEREUM, res, 'transfer', eth_con.address, recipient=address
+            )
     except Exception as e:
-        await state.clear()
         await callback.message.bot.edit_message_text(
             message_id=callback.message.message_id,
             chat_id=callback.message.chat.id,
-            text=ua_config.get('transactions', 'problems_with_transactions').format(error=e)
+            text=ua_config.get('transactions', 'problems_with_transactions').format(
+                error=e if not sent else f'{e} (already sent: {", ".join(sent)})'
+            )
         )
         return
-    await state.clear()
     await callback.message.bot.edit_message_text(
         message_id=callback.message.message_id,
         chat_id=callback.message.chat.id,
-        text=ua_config.get('transactions', 'success_transaction').format(txid=res),
-        reply_markup=MainKeyboards.blockchain_explorer_button(txid=f'0x{res}')
+        text=ua_config.get('transactions', 'success_transaction').format(txid='\n'.join(sent)),
+        reply_markup=MainKeyboards.blockchain_explorer_button(txid=f'0x{sent[-1]}')
     )
 
 
 @everything_else_router.callback_query(EverythingElseStates.deposit_confirmation)
 async def deposit_confirmation_handler(callback: CallbackQuery, state: FSMContext) -> None:
+    data = await state.get_data()
+    # Leaving the confirmation state before anything is sent turns a second press into a no-op
+    await state.clear()
     if callback.data == 'no':
-        await state.clear()
         await callback.message.bot.edit_message_text(
             message_id=callback.message.message_id,
             chat_id=callback.message.chat.id,
@@ -246,19 +265,16 @@ async def deposit_confirmation_handler(callback: CallbackQuery, state: FSMContex
         chat_id=callback.message.chat.id,
         text=ua_config.get('main', 'processing')
     )
-    data = await state.get_data()
-    amount = float(data.get('amount').split(' ')[0])
     try:
-        status, txid = await make_deposit(amount=amount, telegram_id=callback.message.chat.id)
+        amount, symbol = parse_amount(data.get('amount'))
+        status, txid = await make_deposit(amount=amount, symbol=symbol, telegram_id=callback.message.chat.id)
     except Exception as e:
-        await state.clear()
         await callback.message.bot.edit_message_text(
             message_id=callback.message.message_id,
             chat_id=callback.message.chat.id,
             text=ua_config.get('transactions', 'problems_with_transactions').format(error=e)
         )
         return
-    await state.clear()
     await callback.message.bot.edit_message_text(
         message_id=callback.message.message_id,
         chat_id=callback.message.chat.id,
@@ -269,8 +285,10 @@ async def deposit_confirmation_handler(callback: CallbackQuery, state: FSMContex
 
 @everything_else_router.callback_query(EverythingElseStates.withdraw_confirmation)
 async def withdraw_confirmation_handler(callback: CallbackQuery, state: FSMContext) -> None:
+    data = await state.get_data()
+    # Leaving the confirmation state before anything is sent turns a second press into a no-op
+    await state.clear()
     if callback.data == 'no':
-        await state.clear()
         await callback.message.bot.edit_message_text(
             message_id=callback.message.message_id,
             chat_id=callback.message.chat.id,
@@ -282,19 +300,16 @@ async def withdraw_confirmation_handler(callback: CallbackQuery, state: FSMConte
         chat_id=callback.message.chat.id,
         text=ua_config.get('main', 'processing')
     )
-    data = await state.get_data()
-    amount = float(data.get('amount').split(' ')[0])
     try:
-        txid = await make_withdraw(amount=amount, telegram_id=callback.message.chat.id)
+        amount, symbol = parse_amount(data.get('amount'))
+        txid = await make_withdraw(amount=amount, symbol=symbol, telegram_id=callback.message.chat.id)
     except Exception as e:
-        await state.clear()
         await callback.message.bot.edit_message_text(
             message_id=callback.message.message_id,
             chat_id=callback.message.chat.id,
             text=ua_config.get('transactions', 'problems_with_transactions').format(error=e)
         )
         return
-    await state.clear()
     await callback.message.bot.edit_message_text(
         message_id=callback.message.message_id,
         chat_id=callback.message.chat.id,
@@ -306,5 +321,4 @@ async def withdraw_confirmation_handler(callback: CallbackQuery, state: FSMConte
 @everything_else_router.message()
 async def everything_else_handler(message: Message, state: FSMContext) -> None:
     await state.clear()
-    print('hey')
-    await make_deposit(amount=0.0001, telegram_id=message.from_user.id)
+    await message.reply(text=ua_config.get('main', 'invalid_action'))
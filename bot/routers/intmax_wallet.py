@@ -3,6 +3,7 @@ from aiogram.types import Message
 from aiogram.fsm.context import FSMContext
 
 from configuration import ua_config
+from database.user_cache import CachedUser
 
 from bot.utils.message_generator import generate_intmax_balance_message
 
@@ -10,7 +11,7 @@ intmax_balance_router = Router()
 
 
 @intmax_balance_router.message(F.text == ua_config.get('main_menu', 'intmax_wallet'))
-async def wallet_text_handler(message: Message, state: FSMContext) -> None:
+async def wallet_text_handler(message: Message, state: FSMContext, user: CachedUser) -> None:
     await state.clear()
-    text = await generate_intmax_balance_message(message.from_user.id)
+    text = await generate_intmax_balance_message(user)
     await message.reply(text=text)
@@ -4,6 +4,7 @@ from aiogram.filters import CommandStart
 from aiogram.fsm.context import FSMContext
 
 from database.connector import DbConnector
+from database.user_cache import CachedUser
 from configuration import ua_config
 
 from bot.utils.eth_accounts import WalletManager
@@ -14,14 +15,14 @@ registration_router = Router()
 
 
 @registration_router.message(CommandStart())
-async def command_start_handler(message: Message, state: FSMContext) -> None:
+async def command_start_handler(message: Message, state: FSMContext, user: CachedUser) -> None:
     await state.clear()
-    db_connector = DbConnector()
-    user = await db_connector.get_user(message.from_user.id)
     if user.wallet_address is None:
+        db_connector = DbConnector()
         wallet = WalletManager.create_wallet()
         await db_connector.set_wallet_details(
             user, wallet["address"], wallet["keystore"]
         )
-    text = await generate_initial_message(message.from_user.id)
+        user = await db_connector.get_user(message.from_user.id)
+    text = await generate_initial_message(user)
     await message.reply(text=text, reply_markup=MainKeyboards.menu_keyboard())
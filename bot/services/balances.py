@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Awaitable, Callable, Dict, Optional, Sequence, Tuple
+
+from bot.services.intmax_sessions import intmax_sessions
+from bot.services.key_cache import key_cache
+from bot.services.networks import ETHEREUM, INTMAX
+from bot.services.redis_client import redis_client
+from bot.services.token_registry import token_registry
+from bot.utils.eth_connector import ETHConnector
+from configuration import BALANCE_TIMEOUT, BALANCE_CACHE_FRESH, BALANCE_CACHE_TTL
+from database.user_cache import CachedUser
+from services.singleton import SingletonMeta
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BalanceSnapshot:
+    """Balances of one user across networks; a source that failed or timed out is ``None``."""
+    address: Optional[str]
+    intmax_address: Optional[str] = None
+    l1: Optional[Decimal] = None
+    intmax: Optional[Decimal] = None
+    errors: Dict[str, str] = field(default_factory=dict)
+
+
+class BalanceService(metaclass=SingletonMeta):
+    """
+    Fetches L1 and IntMax balances concurrently, each under its own timeout,
+    through a short-lived Redis cache that transactions invalidate.
+
+    The L1 balance is read by address and never needs the keystore; only
+    IntMax, whose sidecar session is bound to the key, unlocks it.
+    """
+
+    def __init__(self, timeout: float = BALANCE_TIMEOUT):
+        self.timeout = timeout
+        self._refreshing: Dict[Tuple[str, str], asyncio.Task] = {}
+
+    async def snapshot(self, user: CachedUser, sources: Sequence[str] = (ETHEREUM, INTMAX)) -> BalanceSnapshot:
+        snapshot = BalanceSnapshot(address=user.wallet_address)
+        address = user.wallet_address
+        lookups = {}
+        if ETHEREUM in sources:
+            lookups[ETHEREUM] = self._cached(ETHEREUM, address, lambda: self.l1_balance(address))
+        if INTMAX in sources:
+            lookups[INTMAX] = self._cached(INTMAX, address, lambda: self.intmax_balance(user))
+        results = await asyncio.gather(
+            *(asyncio.wait_for(lookup, self.timeout) for lookup in lookups.values()),
+            return_exceptions=True,
+        )
+        for source, result in zip(lookups, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"{source} balance lookup failed for {user.telegram_id}: {result!r}")
+                snapshot.errors[source] = str(result) or type(result).__name__
+            elif source == ETHEREUM:
+                snapshot.l1 = Decimal(result["balance"])
+            else:
+                snapshot.intmax_address, snapshot.intmax = result["intmax_address"], Decimal(result["balance"])
+        return snapshot
+
+    async def _cached(self, network: str, address: str, fetch: Callable[[], Awaitable[dict]]) -> dict:
+        """
+        Serve a balance from Redis, refreshing stale entries in the background.
+
+        Entries younger than ``BALANCE_CACHE_FRESH`` are returned as they are, older
+        ones are returned once more while a single background refresh replaces them.
+        """
+        try:
+            cached = await redis_client.get_balance(address, network)
+        except Exception as e:
+            logger.warning(f"Balance cache read failed: {e}")
+            return await fetch()
+        if cached is None:
+            return await self._fetch_and_store(network, address, fetch)
+        is_stale = time.time() - cached["fetched_at"] >= BALANCE_CACHE_FRESH
+        if is_stale and (network, address) not in self._refreshing:
+            task = asyncio.create_task(self._fetch_and_store(network, address, fetch))
+            self._refreshing[(network, address)] = task
+            task.add_done_callback(lambda done: self._refresh_done(network, address, done))
+        return cached
+
+    async def _fetch_and_store(self, network: str, address: str, fetch: Callable[[], Awaitable[dict]]) -> dict:
+        data = await fetch()
+        try:
+            await redis_client.set_balance(address, network, data, ex=BALANCE_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"Balance cache write failed: {e}")
+        return data
+
+    async def invalidate(self, address: str, network: Optional[str] = None) -> None:
+        """Drop cached balances of ``address`` after a transaction; every network when none is given."""
+        try:
+            await redis_client.invalidate_balance(address, network)
+        except Exception as e:
+            logger.warning(f"Balance cache invalidation failed: {e}")
+
+    def _refresh_done(self, network: str, address: str, task: asyncio.Task) -> None:
+        self._refreshing.pop((network, address), None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Background {network} balance refresh failed for {address}: {task.exception()!r}")
+
+    @staticmethod
+    async def l1_balance(address: str) -> dict:
+        balance = await ETHConnector(address=address).get_balance()
+        return {"balance": str(balance)}
+
+    @staticmethod
+    async def intmax_balance(user: CachedUser) -> dict:
+        private_key = await key_cache.load_private_key(user.keystore)
+        async with intmax_sessions.session(f'0x{private_key}') as connector:
+            eth = await token_registry.resolve("ETH", connector)
+            balances = await connector.get_balances()
+        by_index = {balance['token']['tokenIndex']: balance['amount'] for balance in balances['balances']}
+        eth_balance = eth.from_units(by_index.get(eth.index, 0))
+        return {"balance": str(eth_balance), "intmax_address": connector.address}
+
+
+balance_service = BalanceService()
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+from decimal import Decimal
+from typing import AsyncIterable, AsyncIterator, Iterable, List, Optional, Set, Tuple, Union
+
+from eth_abi import decode, encode
+from eth_utils import function_signature_to_4byte_selector, is_address
+from web3 import Web3
+
+from bot.services.web3_pool import web3_pool, RPCError
+from configuration import L1_RPC_URL, BULK_BALANCE_CHUNK_SIZE, BULK_BALANCE_CONCURRENCY, BULK_BALANCE_MULTICALL
+
+logger = logging.getLogger(__name__)
+
+# Multicall3 is deployed at the same address on mainnet, Sepolia and most other chains
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+AGGREGATE3_SELECTOR = function_signature_to_4byte_selector("aggregate3((address,bool,bytes)[])")
+GET_ETH_BALANCE_SELECTOR = function_signature_to_4byte_selector("getEthBalance(address)")
+
+BalanceResult = Tuple[str, Optional[Decimal]]
+
+
+async def _chunks(addresses: Union[Iterable[str], AsyncIterable[str]], size: int) -> AsyncIterator[List[str]]:
+    chunk = []
+    if hasattr(addresses, "__aiter__"):
+        async for address in addresses:
+            chunk.append(address)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+    else:
+        for address in addresses:
+            chunk.append(address)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+class BulkBalanceScanner:
+    """
+    L1 balances of many wallets, for reports and alerts over the whole user base.
+
+    Addresses are packed ``chunk_size`` at a time into one JSON-RPC batch of
+    ``eth_getBalance`` calls, or into a single Multicall3 ``getEthBalance``
+    ``eth_call`` when ``use_multicall`` is set, with at most ``concurrency``
+    chunks in flight. Results are streamed in completion order as
+    ``(address, balance in ETH)``; the balance is ``None`` when it could not be read.
+    """
+
+    def __init__(
+        self,
+        rpc_url: str = L1_RPC_URL,
+        chunk_size: int = BULK_BALANCE_CHUNK_SIZE,
+        concurrency: int = BULK_BALANCE_CONCURRENCY,
+        use_multicall: bool = BULK_BALANCE_MULTICALL,
+        attempts: int = 3,
+    ):
+        self.rpc_url = rpc_url
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        self.use_multicall = use_multicall
+        self.attempts = attempts
+
+    async def iter_balances(
+        self, addresses: Union[Iterable[str], AsyncIterable[str]], block: str = "latest"
+    ) -> AsyncIterator[BalanceResult]:
+        in_flight: Set[asyncio.Task] = set()
+        try:
+            async for chunk in _chunks(addresses, self.chunk_size):
+                if len(in_flight) >= self.concurrency:
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        for result in task.result():
+                            yield result
+                in_flight.add(asyncio.create_task(self._fetch_chunk(chunk, block)))
+            while in_flight:
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    for result in task.result():
+                        yield result
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+    async def _fetch_chunk(self, chunk: List[str], block: str) -> List[BalanceResult]:
+        valid = [address for address in chunk if address and is_address(address)]
+        balances = {}
+        for attempt in range(1, self.attempts + 1):
+            try:
+                if self.use_multicall:
+                    balances = await self._multicall(valid, block)
+                else:
+                    balances = await self._batch(valid, block)
+                break
+            except Exception as e:
+                logger.warning(f"Balance chunk of {len(valid)} failed (attempt {attempt}/{self.attempts}): {e!r}")
+                if attempt < self.attempts:
+                    await asyncio.sleep(2 ** attempt)
+        return [(address, balances.get(address)) for address in chunk]
+
+    async def _batch(self, addresses: List[str], block: str) -> dict:
+        if not addresses:
+            return {}
+        results = await web3_pool.batch(
+            [("eth_getBalance", [address, block]) for address in addresses], rpc_url=self.rpc_url
+        )
+        balances = {}
+        for address, result in zip(addresses, results):
+            if isinstance(result, RPCError):
+                logger.warning(f"eth_getBalance failed for {address}: {result}")
+                continue
+            balances[address] = Web3.from_wei(int(result, 16), 'ether')
+        return balances
+
+    async def _multicall(self, addresses: List[str], block: str) -> dict:
+        if not addresses:
+            return {}
+        calls = [
+            (MULTICALL3_ADDRESS, True, GET_ETH_BALANCE_SELECTOR + encode(["address"], [address]))
+            for address in addresses
+        ]
+        data = AGGREGATE3_SELECTOR + encode(["(address,bool,bytes)[]"], [calls])
+        [result] = await web3_pool.batch(
+            [("eth_call", [{"to": MULTICALL3_ADDRESS, "data": "0x" + data.hex()}, block])], rpc_url=self.rpc_url
+        )
+        if isinstance(result, RPCError):
+            raise result
+        [replies] = decode(["(bool,bytes)[]"], bytes.fromhex(result[2:]))
+        balances = {}
+        for address, (success, return_data) in zip(addresses, replies):
+            if success:
+                balances[address] = Web3.from_wei(decode(["uint256"], return_data)[0], 'ether')
+        return balances
+
+
+bulk_balances = BulkBalanceScanner()
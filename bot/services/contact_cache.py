@@ -0,0 +1,91 @@
+import json
+import logging
+from dataclasses import dataclass, asdict
+from typing import List
+
+from bot.services.redis_client import redis_client
+from configuration import CONTACT_CACHE_TTL
+from database.connector import DbConnector
+from services.singleton import SingletonMeta
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ContactEntry:
+    name: str
+    address: str
+
+
+@dataclass(frozen=True)
+class ContactList:
+    contacts: List[ContactEntry]
+    # Compact "name;address" lines pasted into the model prompt
+    prompt: str
+
+    @classmethod
+    def build(cls, contacts: List[ContactEntry]) -> "ContactList":
+        prompt = "\n".join(f"{contact.name};{contact.address}" for contact in contacts)
+        return cls(contacts=contacts, prompt=prompt)
+
+    def dumps(self) -> str:
+        return json.dumps({"contacts": [asdict(contact) for contact in self.contacts], "prompt": self.prompt})
+
+    @classmethod
+    def loads(cls, raw: str) -> "ContactList":
+        data = json.loads(raw)
+        return cls(contacts=[ContactEntry(**contact) for contact in data["contacts"]], prompt=data["prompt"])
+
+
+class ContactCache(metaclass=SingletonMeta):
+    """
+    Per-user contact lists kept in Redis until the user adds a contact.
+
+    The cache key carries a per-user generation that ``invalidate`` bumps, so a
+    read that loaded the old list from Postgres before the insert committed
+    writes it under the previous generation, where nobody looks any more.
+    Redis problems never break a request: the list is then read from Postgres.
+    """
+
+    def __init__(self, ttl: int = CONTACT_CACHE_TTL):
+        self.ttl = ttl
+
+    @staticmethod
+    def _generation_key(telegram_id: int) -> str:
+        return f"contacts:gen:{telegram_id}"
+
+    @staticmethod
+    def _key(telegram_id: int, generation: str) -> str:
+        return f"contacts:{telegram_id}:{generation}"
+
+    async def get(self, telegram_id: int) -> ContactList:
+        key = None
+        try:
+            generation = await redis_client.get(self._generation_key(telegram_id)) or "0"
+            key = self._key(telegram_id, generation)
+            raw = await redis_client.get(key)
+            if raw is not None:
+                return ContactList.loads(raw)
+        except Exception as e:
+            logger.warning(f"Contact cache read failed: {e}")
+
+        contacts = await DbConnector().get_contacts(telegram_id=telegram_id)
+        contact_list = ContactList.build(
+            [ContactEntry(name=contact.contact_name, address=contact.wallet_address) for contact in contacts]
+        )
+        if key is not None:
+            try:
+                await redis_client.setex(key, self.ttl, contact_list.dumps())
+            except Exception as e:
+                logger.warning(f"Contact cache write failed: {e}")
+        return contact_list
+
+    async def invalidate(self, telegram_id: int) -> None:
+        try:
+            await redis_client.incr(self._generation_key(telegram_id))
+        except Exception as e:
+            # The stale list expires after CONTACT_CACHE_TTL at the latest
+            logger.warning(f"Contact cache invalidation failed: {e}")
+
+
+contact_cache = ContactCache()
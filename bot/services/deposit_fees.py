@@ -0,0 +1,82 @@
+import asyncio
+import logging
+import time
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+
+from web3 import Web3
+
+from bot.services.gas_oracle import gas_oracle
+from bot.services.intmax_sessions import intmax_sessions
+from bot.services.key_cache import key_cache
+from bot.services.token_registry import token_registry
+from configuration import DEPOSIT_FEE_TTL
+from database.user_cache import CachedUser
+from services.singleton import SingletonMeta
+
+logger = logging.getLogger(__name__)
+
+
+class DepositFeeEstimator(metaclass=SingletonMeta):
+    """
+    Fee quotes for IntMax deposits, shown on the deposit confirmation.
+
+    The sidecar's gas estimate depends on the token, not on who deposits or on
+    the exact amount, so it is cached for ``DEPOSIT_FEE_TTL`` seconds per token
+    and order of magnitude of the amount, and concurrent misses share one
+    request. The gas is priced with the gas oracle's current suggestion.
+    """
+
+    def __init__(self, ttl: int = DEPOSIT_FEE_TTL):
+        self.ttl = ttl
+        self._gas: Dict[Tuple[str, int], Tuple[int, float]] = {}
+        self._inflight: Dict[Tuple[str, int], asyncio.Future] = {}
+
+    @staticmethod
+    def _key(symbol: str, amount: Decimal) -> Tuple[str, int]:
+        return symbol, amount.adjusted()
+
+    def cached_gas(self, symbol: str, amount: Decimal) -> Optional[int]:
+        entry = self._gas.get(self._key(symbol, amount))
+        if entry is None or entry[1] < time.monotonic():
+            return None
+        return entry[0]
+
+    async def estimate_gas(self, user: CachedUser, amount: Decimal, symbol: str) -> int:
+        gas = self.cached_gas(symbol, amount)
+        if gas is not None:
+            return gas
+        key = self._key(symbol, amount)
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(key, user, amount, symbol))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def _fetch(self, key: Tuple[str, int], user: CachedUser, amount: Decimal, symbol: str) -> int:
+        private_key = await key_cache.load_private_key(user.keystore)
+        async with intmax_sessions.session(f'0x{private_key}') as connector:
+            token = await token_registry.resolve(symbol, connector)
+            res = await connector.estimate_deposit_gas(amount=token.wire_number(amount), token=token.raw)
+        gas = int(res['gas'])
+        self._gas[key] = (gas, time.monotonic() + self.ttl)
+        return gas
+
+    @staticmethod
+    async def price(gas: int) -> Decimal:
+        """Upper bound of the fee in ETH for ``gas`` at the current fee suggestion."""
+        suggestion = await gas_oracle.suggest()
+        per_gas = suggestion.max_fee_per_gas if suggestion.is_eip1559 else suggestion.gas_price
+        return Web3.from_wei(gas * per_gas, 'ether')
+
+    async def quote(self, user: CachedUser, amount: Decimal, symbol: str) -> Optional[Decimal]:
+        """Fee in ETH for depositing ``amount`` of ``symbol``, ``None`` when it cannot be estimated."""
+        try:
+            return await self.price(await self.estimate_gas(user, amount, symbol))
+        except Exception as e:
+            logger.warning(f"Deposit fee estimate failed for {amount} {symbol}: {e}")
+            return None
+
+
+deposit_fees = DepositFeeEstimator()
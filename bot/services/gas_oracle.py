@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from web3 import Web3
+
+from bot.services.web3_pool import web3_pool
+from configuration import (
+    L1_RPC_URL,
+    GAS_ORACLE_TTL,
+    GAS_ORACLE_INTERVAL,
+    GAS_HISTORY_BLOCKS,
+    GAS_PRIORITY_PERCENTILE,
+    GAS_MIN_PRIORITY_GWEI,
+)
+from services.singleton import SingletonMeta
+
+logger = logging.getLogger(__name__)
+
+# Nodes reject replacements that raise fees by less than 10%
+REPLACEMENT_BUMP = 1.125
+
+
+@dataclass(frozen=True)
+class FeeSuggestion:
+    max_fee_per_gas: Optional[int]
+    max_priority_fee_per_gas: Optional[int]
+    gas_price: Optional[int]
+    sampled_at: float
+
+    @property
+    def is_eip1559(self) -> bool:
+        return self.max_fee_per_gas is not None
+
+    def tx_fields(self) -> dict:
+        if self.is_eip1559:
+            return {
+                'type': 2,
+                'maxFeePerGas': self.max_fee_per_gas,
+                'maxPriorityFeePerGas': self.max_priority_fee_per_gas,
+            }
+        return {'gasPrice': self.gas_price}
+
+
+def bump_fees(tx: dict, current: FeeSuggestion) -> dict:
+    """Fee fields for a replacement of ``tx``: at least 12.5% above it and never below the current suggestion."""
+    def bumped(value: int) -> int:
+        return int(value * REPLACEMENT_BUMP) + 1
+
+    if 'maxFeePerGas' in tx:
+        priority = bumped(tx['maxPriorityFeePerGas'])
+        max_fee = bumped(tx['maxFeePerGas'])
+        if current.is_eip1559:
+            priority = max(priority, current.max_priority_fee_per_gas)
+            max_fee = max(max_fee, current.max_fee_per_gas)
+        return {'type': 2, 'maxFeePerGas': max(max_fee, priority), 'maxPriorityFeePerGas': priority}
+
+    gas_price = bumped(tx['gasPrice'])
+    if current.gas_price is not None:
+        gas_price = max(gas_price, current.gas_price)
+    return {'gasPrice': gas_price}
+
+
+class GasOracle(metaclass=SingletonMeta):
+    """
+    Shared fee suggestions sampled from ``eth_feeHistory`` (``eth_gasPrice`` on legacy chains).
+
+    ``run`` refreshes the suggestion in the background every ``GAS_ORACLE_INTERVAL``
+    seconds, so ``suggest`` normally answers from memory. Only a cold cache or
+    a suggestion older than ``GAS_ORACLE_TTL`` makes the caller wait on an RPC.
+    """
+
+    def __init__(self, ttl: int = GAS_ORACLE_TTL):
+        self.ttl = ttl
+        self._suggestions: Dict[str, FeeSuggestion] = {}
+        self._refreshing: Dict[str, asyncio.Future] = {}
+
+    async def suggest(self, rpc_url: str = L1_RPC_URL) -> FeeSuggestion:
+        suggestion = self._suggestions.get(rpc_url)
+        if suggestion is not None and time.time() - suggestion.sampled_at < self.ttl:
+            return suggestion
+        return await self.refresh(rpc_url)
+
+    async def refresh(self, rpc_url: str = L1_RPC_URL) -> FeeSuggestion:
+        future = self._refreshing.get(rpc_url)
+        if future is None:
+            future = asyncio.ensure_future(self._sample(rpc_url))
+            self._refreshing[rpc_url] = future
+            future.add_done_callback(lambda _: self._refreshing.pop(rpc_url, None))
+        return await asyncio.shield(future)
+
+    async def _sample(self, rpc_url: str) -> FeeSuggestion:
+        w3 = await web3_pool.get(rpc_url)
+        try:
+            history = await w3.eth.fee_history(GAS_HISTORY_BLOCKS, 'latest', [GAS_PRIORITY_PERCENTILE])
+            # The last entry is the base fee of the next, not yet mined, block
+            base_fee = history['baseFeePerGas'][-1]
+            rewards = [block[0] for block in history.get('reward', []) if block and block[0] > 0]
+            priority = max(
+                int(statistics.median(rewards)) if rewards else 0,
+                Web3.to_wei(GAS_MIN_PRIORITY_GWEI, 'gwei'),
+            )
+            suggestion = FeeSuggestion(
+                max_fee_per_gas=2 * base_fee + priority,
+                max_priority_fee_per_gas=priority,
+                gas_price=None,
+                sampled_at=time.time(),
+            )
+        except Exception as e:
+            logger.info(f"eth_feeHistory unusable on {rpc_url} ({e}), falling back to eth_gasPrice")
+            suggestion = FeeSuggestion(
+                max_fee_per_gas=None,
+                max_priority_fee_per_gas=None,
+                gas_price=await w3.eth.gas_price,
+                sampled_at=time.time(),
+            )
+        self._suggestions[rpc_url] = suggestion
+        return suggestion
+
+    async def run(self, rpc_url: str = L1_RPC_URL, interval: int = GAS_ORACLE_INTERVAL) -> None:
+        while True:
+            try:
+                await self.refresh(rpc_url)
+            except Exception as e:
+                logger.warning(f"Gas oracle refresh failed: {e}")
+            await asyncio.sleep(interval)
+
+
+gas_oracle = GasOracle()
@@ -0,0 +1,162 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Set
+
+import aiohttp
+
+from bot.utils.intmax_connector import IntMaxConnector
+from configuration import INTMAX_SESSION_TTL, INTMAX_POOL_LIMIT, INTMAX_KEEPALIVE_TIMEOUT, INTMAX_MAX_SESSIONS
+from services.singleton import SingletonMeta
+
+logger = logging.getLogger(__name__)
+
+
+class _PooledSession:
+    __slots__ = ("connector", "last_used")
+
+    def __init__(self, connector: IntMaxConnector):
+        self.connector = connector
+        self.last_used = time.monotonic()
+
+
+class IntMaxSessionPool(metaclass=SingletonMeta):
+    """
+    Process-wide pool of logged-in IntMax sessions.
+
+    All connectors share one keep-alive ``aiohttp`` connection pool, and each
+    wallet logs in once and keeps its ``x-session-id`` until it has been idle
+    for ``INTMAX_SESSION_TTL`` seconds. Sessions dropped by the server are
+    re-established by ``IntMaxConnector`` on the first 401.
+
+    A connector holds its wallet's key for re-logins, so the pool is capped at
+    ``INTMAX_MAX_SESSIONS`` like the sidecar: the least recently used session
+    is logged out, which also drops the key, when a new wallet logs in. The
+    sidecar counts the logins to a shared session, so a logout only ends it
+    once no other connector of the same wallet still holds it.
+    """
+
+    def __init__(self, ttl: int = INTMAX_SESSION_TTL, max_sessions: int = INTMAX_MAX_SESSIONS):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._http: Optional[aiohttp.ClientSession] = None
+        self._sessions: "OrderedDict[str, _PooledSession]" = OrderedDict()
+        self._logins: Dict[str, asyncio.Future] = {}
+        self._logouts: Set[asyncio.Task] = set()
+
+    @property
+    def http(self) -> aiohttp.ClientSession:
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=INTMAX_POOL_LIMIT, keepalive_timeout=INTMAX_KEEPALIVE_TIMEOUT)
+            )
+        return self._http
+
+    @staticmethod
+    def _pool_key(eth_private_key: str) -> str:
+        # Never keep raw key material as a dictionary key
+        return hashlib.sha256(eth_private_key.encode()).hexdigest()
+
+    async def acquire(self, eth_private_key: str) -> IntMaxConnector:
+        """Return a logged-in connector for the wallet, logging in only if no live session exists."""
+        key = self._pool_key(eth_private_key)
+        pooled = self._sessions.get(key)
+        if pooled is not None and time.monotonic() - pooled.last_used < self.ttl:
+            pooled.last_used = time.monotonic()
+            self._sessions.move_to_end(key)
+            return pooled.connector
+
+        future = self._logins.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._login(key, eth_private_key))
+            self._logins[key] = future
+            future.add_done_callback(lambda _: self._logins.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def _login(self, key: str, eth_private_key: str) -> IntMaxConnector:
+        stale = self._sessions.pop(key, None)
+        if stale is not None:
+            # Gives back the stale connector's reference to the sidecar session
+            self._logout_later(stale.connector)
+        connector = IntMaxConnector(session=self.http)
+        await connector.login(eth_private_key)
+        self._sessions[key] = _PooledSession(connector)
+        while len(self._sessions) > self.max_sessions:
+            _, evicted = self._sessions.popitem(last=False)
+            self._logout_later(evicted.connector)
+        return connector
+
+    def _logout_later(self, connector: IntMaxConnector) -> None:
+        task = asyncio.create_task(self._logout(connector))
+        self._logouts.add(task)
+        task.add_done_callback(self._logouts.discard)
+
+    def any_session(self) -> Optional[IntMaxConnector]:
+        """Most recently used live session, for calls any logged-in wallet may make, or ``None``."""
+        if not self._sessions:
+            return None
+        pooled = next(reversed(self._sessions.values()))
+        if time.monotonic() - pooled.last_used >= self.ttl:
+            return None
+        return pooled.connector
+
+    @asynccontextmanager
+    async def session(self, eth_private_key: str) -> AsyncIterator[IntMaxConnector]:
+        """Drop-in replacement for ``async with IntMaxConnector() as c: await c.login(...)``."""
+        connector = await self.acquire(eth_private_key)
+        yield connector
+
+    @asynccontextmanager
+    async def ephemeral(self, eth_private_key: str) -> AsyncIterator[IntMaxConnector]:
+        """
+        Session for background jobs that touch many wallets once.
+
+        A wallet already in the pool uses its pooled session, any other one logs
+        in outside the pool and is logged out again on exit, so scans neither
+        grow the pool nor push active users out of it.
+        """
+        pooled = self._sessions.get(self._pool_key(eth_private_key))
+        if pooled is not None and time.monotonic() - pooled.last_used < self.ttl:
+            yield pooled.connector
+            return
+        connector = IntMaxConnector(session=self.http)
+        await connector.login(eth_private_key)
+        try:
+            yield connector
+        finally:
+            await self._logout(connector)
+
+    @staticmethod
+    async def _logout(connector: IntMaxConnector) -> None:
+        try:
+            await connector.logout()
+        except Exception as e:
+            logger.warning(f"IntMax logout failed: {e}")
+
+    async def close_idle(self) -> int:
+        """Log out of sessions that have been idle longer than the TTL."""
+        now = time.monotonic()
+        idle = [key for key, pooled in self._sessions.items() if now - pooled.last_used >= self.ttl]
+        connectors = [self._sessions.pop(key).connector for key in idle]
+        await asyncio.gather(*(self._logout(connector) for connector in connectors))
+        return len(connectors)
+
+    async def run_reaper(self, interval: int = 60) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            closed = await self.close_idle()
+            if closed:
+                logger.info(f"Closed {closed} idle IntMax sessions, {len(self._sessions)} active")
+
+    async def close(self) -> None:
+        connectors = [pooled.connector for pooled in self._sessions.values()]
+        self._sessions.clear()
+        await asyncio.gather(*(self._logout(connector) for connector in connectors))
+        if self._http is not None and not self._http.closed:
+            await self._http.close()
+
+
+intmax_sessions = IntMaxSessionPool()
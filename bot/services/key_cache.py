@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from eth_account import Account
+
+from configuration import ENCRYPTION_PASSWORD, KEY_CACHE_TTL, KEY_CACHE_SIZE, KEY_DECRYPT_WORKERS
+from services.singleton import SingletonMeta
+
+logger = logging.getLogger(__name__)
+
+
+def _decrypt_keystore(keystore: dict, password: str) -> bytes:
+    """Runs in a worker process: scrypt is CPU bound and must stay off the event loop."""
+    return bytes(Account.decrypt(keystore, password))
+
+
+@dataclass
+class KeyCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    kdf_calls: int = 0
+    kdf_seconds: float = 0.0
+
+    @property
+    def avg_kdf_seconds(self) -> float:
+        return self.kdf_seconds / self.kdf_calls if self.kdf_calls else 0.0
+
+
+class KeyCache(metaclass=SingletonMeta):
+    """
+    Bounded cache of decrypted private keys.
+
+    Keystores are decrypted in a process pool, unlocked keys are kept in memory
+    for ``KEY_CACHE_TTL`` seconds and overwritten with zeros once evicted.
+    A full cache evicts the least recently used key. Callers always get their
+    own copy, so an eviction never wipes a key that is still being used.
+    """
+
+    def __init__(self, ttl: int = KEY_CACHE_TTL, max_size: int = KEY_CACHE_SIZE, workers: int = KEY_DECRYPT_WORKERS):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.workers = workers
+        self.stats = KeyCacheStats()
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[bytearray, float]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    @staticmethod
+    def _cache_key(keystore: dict) -> Tuple[str, str]:
+        # The ciphertext distinguishes a re-created wallet from the old one with the same address
+        return keystore.get("address", ""), keystore.get("crypto", {}).get("ciphertext", "")
+
+    async def load_private_key(self, keystore: dict) -> str:
+        """Return the hex private key for ``keystore``, decrypting it off-loop on a miss."""
+        key = self._cache_key(keystore)
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] <= time.monotonic():
+            self._evict(key)
+            entry = None
+        if entry is not None:
+            self.stats.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0].hex()
+
+        self.stats.misses += 1
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._decrypt(key, keystore))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return (await asyncio.shield(future)).hex()
+
+    async def _decrypt(self, key: Tuple[str, str], keystore: dict) -> bytes:
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        raw = await loop.run_in_executor(self.executor, _decrypt_keystore, keystore, ENCRYPTION_PASSWORD)
+        self.stats.kdf_calls += 1
+        self.stats.kdf_seconds += time.perf_counter() - started
+        self._store(key, bytearray(raw))
+        # The cached buffer is zeroed on eviction, which may happen before the waiters resume
+        return raw
+
+    def _store(self, key: Tuple[str, str], secret: bytearray) -> None:
+        if key in self._entries:
+            self._evict(key)
+        self._purge_expired()
+        while len(self._entries) >= self.max_size:
+            self._evict(next(iter(self._entries)))
+        self._entries[key] = (secret, time.monotonic() + self.ttl)
+
+    def _evict(self, key: Tuple[str, str]) -> None:
+        secret, _ = self._entries.pop(key)
+        secret[:] = bytes(len(secret))
+        self.stats.evictions += 1
+
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        # Hits reorder the entries, so expired ones can sit anywhere
+        for key in [key for key, (_, expires_at) in self._entries.items() if expires_at <= now]:
+            self._evict(key)
+
+    def invalidate(self, keystore: dict) -> None:
+        key = self._cache_key(keystore)
+        if key in self._entries:
+            self._evict(key)
+
+    def clear(self) -> None:
+        for key in list(self._entries):
+            self._evict(key)
+
+    def close(self) -> None:
+        """Wipe all cached keys and stop the worker processes."""
+        self.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        logger.info(
+            "Key cache closed: hits=%s misses=%s kdf_calls=%s avg_kdf=%.3fs",
+            self.stats.hits, self.stats.misses, self.stats.kdf_calls, self.stats.avg_kdf_seconds,
+        )
+
+
+key_cache = KeyCache()
@@ -0,0 +1,4 @@
+# Network names used in balance cache keys, watched transactions and user-facing choices
+ETHEREUM = "ethereum"
+INTMAX = "intmax"
+NETWORKS = (ETHEREUM, INTMAX)
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from web3 import AsyncWeb3
+
+from bot.services.redis_client import redis_client
+from configuration import NONCE_BACKEND, NONCE_TTL, NONCE_PENDING_TTL
+from services.singleton import SingletonMeta
+
+logger = logging.getLogger(__name__)
+
+NONCE_TOO_LOW_MARKERS = ("nonce too low", "nonce is too low", "oldnonce", "nonce_expired")
+
+
+@dataclass
+class PendingTx:
+    nonce: int
+    tx_hash: str
+    tx: dict
+    sent_at: float = field(default_factory=time.time)
+
+
+class NonceManager(metaclass=SingletonMeta):
+    """
+    Hands out nonces per sender address without reading the chain before each send.
+
+    The counter is seeded from the chain's pending transaction count on first use,
+    after a "nonce too low" error and after ``NONCE_TTL`` seconds without a send,
+    so a transaction dropped from the mempool cannot leave it ahead of the chain
+    for good. It lives either in process memory or in Redis (``NONCE_BACKEND``)
+    when several bot processes share wallets. Sent transactions are remembered
+    until confirmed, for ``NONCE_PENDING_TTL`` seconds at most.
+    """
+
+    def __init__(self, backend: str = NONCE_BACKEND, ttl: int = NONCE_TTL, pending_ttl: int = NONCE_PENDING_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self.pending_ttl = pending_ttl
+        self._next: Dict[str, int] = {}
+        self._used_at: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._pending: Dict[str, Dict[int, PendingTx]] = defaultdict(dict)
+
+    @staticmethod
+    def _redis_key(address: str) -> str:
+        return f"nonce:{address.lower()}"
+
+    @staticmethod
+    def is_nonce_too_low(error: Exception) -> bool:
+        message = str(error).lower()
+        return any(marker in message for marker in NONCE_TOO_LOW_MARKERS)
+
+    async def allocate(self, w3: AsyncWeb3, address: str) -> int:
+        async with self._locks[address]:
+            if self.backend == "redis":
+                key = self._redis_key(address)
+                nonce = await redis_client.incr_existing(key, self.ttl)
+                if nonce is None:
+                    chain_nonce = await w3.eth.get_transaction_count(address, "pending")
+                    # Stores the last handed out nonce, so INCR returns the next one
+                    await redis_client.set(key, chain_nonce - 1, ex=self.ttl, nx=True)
+                    nonce = await redis_client.incr_existing(key, self.ttl)
+                return nonce
+
+            if address not in self._next or time.monotonic() - self._used_at[address] >= self.ttl:
+                self._next[address] = await w3.eth.get_transaction_count(address, "pending")
+            nonce = self._next[address]
+            self._next[address] = nonce + 1
+            self._used_at[address] = time.monotonic()
+            return nonce
+
+    async def resync(self, w3: AsyncWeb3, address: str) -> None:
+        """Re-seed the counter from the chain and forget transactions that are already mined."""
+        async with self._locks[address]:
+            pending_count, mined_count = await asyncio.gather(
+                w3.eth.get_transaction_count(address, "pending"),
+                w3.eth.get_transaction_count(address, "latest"),
+            )
+            if self.backend == "redis":
+                await redis_client.set(self._redis_key(address), pending_count - 1, ex=self.ttl)
+            else:
+                self._next[address] = pending_count
+                self._used_at[address] = time.monotonic()
+            self.confirm(address, mined_count - 1)
+        logger.info(f"Resynced nonce for {address}: next={pending_count}")
+
+    async def invalidate(self, address: str) -> None:
+        """Drop the local counter so the next allocation re-reads it from the chain."""
+        async with self._locks[address]:
+            if self.backend == "redis":
+                await redis_client.delete(self._redis_key(address))
+            else:
+                self._next.pop(address, None)
+
+    def track(self, address: str, nonce: int, tx_hash: str, tx: dict) -> None:
+        self._prune()
+        self._pending[address][nonce] = PendingTx(nonce=nonce, tx_hash=tx_hash, tx=tx)
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.pending_ttl
+        for address in list(self._pending):
+            pending = self._pending[address]
+            for nonce in [n for n, tracked in pending.items() if tracked.sent_at < cutoff]:
+                del pending[nonce]
+            if not pending:
+                del self._pending[address]
+
+    def confirm(self, address: str, nonce: int) -> None:
+        """Forget every tracked transaction up to and including ``nonce``."""
+        pending = self._pending.get(address)
+        if not pending:
+            return
+        for tracked in [n for n in pending if n <= nonce]:
+            del pending[tracked]
+        if not pending:
+            del self._pending[address]
+
+    def pending(self, address: str) -> List[PendingTx]:
+        return sorted(self._pending.get(address, {}).values(), key=lambda p: p.nonce)
+
+    def get_pending(self, address: str, nonce: int) -> Optional[PendingTx]:
+        return self._pending.get(address, {}).get(nonce)
+
+
+nonce_manager = NonceManager()
@@ -1,13 +1,23 @@
 import redis.asyncio as redis
 from typing import Optional, Any, Union
+import json
 import logging
 from functools import wraps
 import time
 
+from bot.services.networks import NETWORKS
 from configuration import REDIS_PASSWORD
 
 logger = logging.getLogger(__name__)
 
+# INCR that never creates the key, so an expired counter is re-seeded by the caller instead of restarting at 1
+INCR_EXISTING_SCRIPT = (
+    "if redis.call('EXISTS', KEYS[1]) == 0 then return nil end "
+    "local value = redis.call('INCR', KEYS[1]) "
+    "redis.call('EXPIRE', KEYS[1], ARGV[1]) "
+    "return value"
+)
+
 
 class RedisClient:
     def __init__(
@@ -61,9 +71,9 @@ class RedisClient:
         return wrapper
 
     @ensure_connection
-    async def set(self, key: str, value: Any, ex: Optional[int] = None) -> bool:
-        """Set a key-value pair with optional expiration."""
-        return await self._client.set(key, value, ex=ex)
+    async def set(self, key: str, value: Any, ex: Optional[int] = None, nx: bool = False) -> bool:
+        """Set a key-value pair with optional expiration, only if absent when ``nx`` is set."""
+        return await self._client.set(key, value, ex=ex, nx=nx)
 
     @ensure_connection
     async def get(self, key: str) -> Optional[str]:
@@ -85,11 +95,105 @@ class RedisClient:
         """Set a key-value pair with expiration in seconds."""
         return await self._client.setex(key, time, value)
 
+    @ensure_connection
+    async def incr(self, key: str, amount: int = 1) -> int:
+        """Atomically increment an integer value and return the result."""
+        return await self._client.incr(key, amount)
+
+    @ensure_connection
+    async def incr_existing(self, key: str, ex: int) -> Optional[int]:
+        """Increment an existing counter and renew its expiration; ``None`` when the key does not exist."""
+        return await self._client.eval(INCR_EXISTING_SCRIPT, 1, key, ex)
+
     @ensure_connection
     async def ttl(self, key: str) -> int:
         """Get the time to live for a key in seconds."""
         return await self._client.ttl(key)
 
+    @ensure_connection
+    async def rpush(self, key: str, *values: Any) -> int:
+        """Append values to the tail of a list and return its new length."""
+        return await self._client.rpush(key, *values)
+
+    @ensure_connection
+    async def lpush(self, key: str, *values: Any) -> int:
+        """Prepend values to the head of a list and return its new length."""
+        return await self._client.lpush(key, *values)
+
+    @ensure_connection
+    async def lmove(self, source: str, destination: str, src: str = "LEFT", dest: str = "RIGHT") -> Optional[str]:
+        """Atomically move one element between lists, ``None`` when ``source`` is empty."""
+        return await self._client.lmove(source, destination, src, dest)
+
+    @ensure_connection
+    async def blmove(
+        self, source: str, destination: str, timeout: float, src: str = "LEFT", dest: str = "RIGHT"
+    ) -> Optional[str]:
+        """Like ``lmove`` but wait up to ``timeout`` seconds for an element to appear."""
+        return await self._client.blmove(source, destination, timeout, src, dest)
+
+    @ensure_connection
+    async def lrem(self, key: str, count: int, value: Any) -> int:
+        """Remove ``count`` occurrences of ``value`` from a list (all of them when 0)."""
+        return await self._client.lrem(key, count, value)
+
+    @ensure_connection
+    async def llen(self, key: str) -> int:
+        """Length of a list."""
+        return await self._client.llen(key)
+
+    @ensure_connection
+    async def hset(self, key: str, field: str, value: Any) -> int:
+        """Set one field of a hash."""
+        return await self._client.hset(key, field, value)
+
+    @ensure_connection
+    async def hgetall(self, key: str) -> dict:
+        """All fields and values of a hash."""
+        return await self._client.hgetall(key)
+
+    @ensure_connection
+    async def hdel(self, key: str, *fields: str) -> int:
+        """Delete fields of a hash."""
+        return await self._client.hdel(key, *fields)
+
+    @ensure_connection
+    async def sadd(self, key: str, *members: Any) -> int:
+        """Add members to a set."""
+        return await self._client.sadd(key, *members)
+
+    @ensure_connection
+    async def smembers(self, key: str) -> set:
+        """All members of a set."""
+        return await self._client.smembers(key)
+
+    @ensure_connection
+    async def srem(self, key: str, *members: Any) -> int:
+        """Remove members from a set."""
+        return await self._client.srem(key, *members)
+
+    @staticmethod
+    def _balance_key(address: str, network: str) -> str:
+        return f"balance:{network}:{address.lower()}"
+
+    @ensure_connection
+    async def get_balance(self, address: str, network: str) -> Optional[dict]:
+        """Get a cached balance entry, ``fetched_at`` tells how old it is."""
+        raw = await self._client.get(self._balance_key(address, network))
+        return json.loads(raw) if raw is not None else None
+
+    @ensure_connection
+    async def set_balance(self, address: str, network: str, data: dict, ex: int) -> bool:
+        """Cache a balance entry for ``ex`` seconds, stamped with the current time."""
+        payload = json.dumps({**data, "fetched_at": time.time()})
+        return await self._client.set(self._balance_key(address, network), payload, ex=ex)
+
+    @ensure_connection
+    async def invalidate_balance(self, address: str, network: Optional[str] = None) -> int:
+        """Drop cached balances of an address, on one network or on all of them."""
+        networks = [network] if network else NETWORKS
+        return await self._client.delete(*(self._balance_key(address, n) for n in networks))
+
     async def close(self) -> None:
         """Close the Redis connection."""
         if self._client:
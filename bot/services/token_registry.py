@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import re
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Optional, Tuple, Union
+
+from bot.services.intmax_sessions import intmax_sessions
+from bot.utils.intmax_connector import IntMaxConnector
+from configuration import TOKEN_REFRESH_INTERVAL
+from services.singleton import SingletonMeta
+
+logger = logging.getLogger(__name__)
+
+AMOUNT_RE = re.compile(r"^\s*(\d+(?:[.,]\d+)?)\s*([A-Za-z]*)\s*$")
+DEFAULT_SYMBOL = "ETH"
+
+
+def parse_amount(text: str) -> Tuple[Decimal, str]:
+    """Split an intent amount such as ``"0.03 ETH"`` into an exact value and a symbol (ETH if none)."""
+    match = AMOUNT_RE.match(text)
+    if match is None:
+        raise ValueError(f"invalid amount {text!r}")
+    try:
+        value = Decimal(match.group(1).replace(',', '.'))
+    except InvalidOperation as e:
+        raise ValueError(f"invalid amount {text!r}") from e
+    if value <= 0:
+        raise ValueError(f"amount must be positive, got {text!r}")
+    return value, (match.group(2) or DEFAULT_SYMBOL).upper()
+
+
+@dataclass(frozen=True)
+class Token:
+    index: int
+    symbol: str
+    decimals: int
+    contract_address: str
+    # The sidecar's own token object, passed back as-is on deposits, withdrawals and transfers
+    raw: Dict[str, Any]
+
+    @classmethod
+    def from_sidecar(cls, raw: Dict[str, Any]) -> "Token":
+        return cls(
+            index=int(raw["tokenIndex"]),
+            symbol=raw["symbol"].upper(),
+            decimals=int(raw["decimals"]),
+            contract_address=raw["contractAddress"].lower(),
+            raw=raw,
+        )
+
+    def to_units(self, amount: Decimal) -> int:
+        """Exact amount in the token's smallest unit, rejecting more precision than the token has."""
+        units = amount.scaleb(self.decimals)
+        if units != units.to_integral_value():
+            raise ValueError(f"{self.symbol} has only {self.decimals} decimals")
+        return int(units)
+
+    def from_units(self, units: Union[int, str]) -> Decimal:
+        return Decimal(units).scaleb(-self.decimals)
+
+    def wire_amount(self, amount: Decimal) -> str:
+        """Exact decimal string for a transfer, validated against the token's precision first."""
+        self.to_units(amount)
+        return f'{amount:f}'
+
+    def wire_number(self, amount: Decimal) -> float:
+        """Amount for the sidecar's deposit and withdraw bodies, which only take JSON numbers."""
+        self.to_units(amount)
+        # Exact up to 15 significant digits, past that the sidecar's double is the limit, not this cast
+        return float(amount)
+
+
+class TokenRegistry(metaclass=SingletonMeta):
+    """
+    IntMax token list, indexed by symbol, token index and contract address.
+
+    The sidecar only serves it to logged-in sessions, so the list is loaded
+    through a caller's connector, and the background refresh in ``run`` borrows
+    whichever session in the pool is live, skipping a round when none is.
+    Lookups after the first load are dictionary reads without any round trip.
+    """
+
+    def __init__(self, refresh_interval: int = TOKEN_REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self._by_symbol: Dict[str, Token] = {}
+        self._by_index: Dict[int, Token] = {}
+        self._by_contract: Dict[str, Token] = {}
+        self._lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self._by_index)
+
+    def by_symbol(self, symbol: str) -> Optional[Token]:
+        return self._by_symbol.get(symbol.upper())
+
+    def by_index(self, index: int) -> Optional[Token]:
+        return self._by_index.get(index)
+
+    def by_contract(self, contract_address: str) -> Optional[Token]:
+        return self._by_contract.get(contract_address.lower())
+
+    async def ensure(self, connector: IntMaxConnector) -> None:
+        """Load the list through ``connector`` unless it is already loaded."""
+        if self.loaded:
+            return
+        async with self._lock:
+            if not self.loaded:
+                await self.refresh(connector)
+
+    async def resolve(self, symbol: str, connector: IntMaxConnector) -> Token:
+        await self.ensure(connector)
+        token = self.by_symbol(symbol)
+        if token is None:
+            raise ValueError(f"Unknown token {symbol}")
+        return token
+
+    async def refresh(self, connector: Optional[IntMaxConnector] = None) -> None:
+        connector = connector or intmax_sessions.any_session()
+        if connector is None:
+            logger.debug("Token registry refresh skipped, no live IntMax session")
+            return
+        res = await connector.get_tokens()
+        tokens = [Token.from_sidecar(raw) for raw in res['tokens']]
+        by_symbol = {}
+        for token in sorted(tokens, key=lambda t: t.index, reverse=True):
+            # Symbols are not unique on IntMax, the lowest index is the canonical token
+            by_symbol[token.symbol] = token
+        self._by_symbol = by_symbol
+        self._by_index = {token.index: token for token in tokens}
+        self._by_contract = {token.contract_address: token for token in tokens}
+        logger.info(f"Token registry loaded {len(tokens)} tokens")
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Token registry refresh failed: {e}")
+
+
+token_registry = TokenRegistry()
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.types import Voice
+
+from bot.services.redis_client import redis_client
+from bot.utils.ai_helper import transcribe_audio
+from configuration import TRANSCRIPTION_CACHE_TTL, AUDIO_MAX_DURATION, AUDIO_WORKERS, FFMPEG_BINARY
+from database.connector import DbConnector
+from services.singleton import SingletonMeta
+
+logger = logging.getLogger(__name__)
+
+# Drop leading silence and every pause longer than 0.7s, then downmix to 16 kHz mono opus
+FFMPEG_FILTER = (
+    "silenceremove=start_periods=1:start_threshold=-45dB"
+    ":stop_periods=-1:stop_duration=0.7:stop_threshold=-45dB"
+)
+# An ogg/opus file below this size holds well under half a second of sound
+MIN_AUDIO_BYTES = 1024
+
+
+class Transcriber(metaclass=SingletonMeta):
+    """
+    Voice-to-text with a Redis cache keyed by Telegram's ``file_unique_id``.
+
+    Forwarded or repeated voice notes are answered from the cache without being
+    downloaded. New ones are trimmed of silence, cut to ``AUDIO_MAX_DURATION``
+    and downsampled by a bounded pool of ffmpeg processes before the upload.
+    """
+
+    def __init__(self, ttl: int = TRANSCRIPTION_CACHE_TTL, workers: int = AUDIO_WORKERS):
+        self.ttl = ttl
+        self.workers = workers
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._ffmpeg_available = True
+
+    @staticmethod
+    def _key(file_unique_id: str) -> str:
+        return f"transcription:{file_unique_id}"
+
+    async def transcribe(self, bot: Bot, voice: Voice, telegram_id: int) -> str:
+        key = self._key(voice.file_unique_id)
+        try:
+            cached = await redis_client.get(key)
+        except Exception as e:
+            logger.warning(f"Transcription cache read failed: {e}")
+            cached = None
+        if cached is not None:
+            await DbConnector.add_message(
+                telegram_id=telegram_id, content=cached, role="user", mtype="transcribed-voice")
+            return cached
+
+        file = await bot.download(voice.file_id)
+        audio = file.read()
+        processed = await self.preprocess(audio)
+        if processed is not None and len(processed) < MIN_AUDIO_BYTES:
+            # Nothing but silence, do not pay for the upload
+            text = ""
+        else:
+            text = await transcribe_audio(processed if processed is not None else audio, telegram_id)
+        try:
+            await redis_client.setex(key, self.ttl, text)
+        except Exception as e:
+            logger.warning(f"Transcription cache write failed: {e}")
+        return text
+
+    async def preprocess(self, audio: bytes) -> Optional[bytes]:
+        """Return trimmed 16 kHz mono opus, or ``None`` when ffmpeg is unavailable or fails."""
+        if not self._ffmpeg_available:
+            return None
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        async with self._slots:
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    FFMPEG_BINARY, "-hide_banner", "-loglevel", "error",
+                    "-i", "pipe:0",
+                    "-t", str(AUDIO_MAX_DURATION),
+                    "-af", FFMPEG_FILTER,
+                    "-ac", "1", "-ar", "16000",
+                    "-c:a", "libopus", "-b:a", "24k",
+                    "-f", "ogg", "pipe:1",
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+            except FileNotFoundError:
+                logger.warning(f"{FFMPEG_BINARY} not found, voice notes are uploaded unprocessed")
+                self._ffmpeg_available = False
+                return None
+            output, errors = await process.communicate(audio)
+        if process.returncode != 0:
+            logger.warning(f"ffmpeg failed ({process.returncode}): {errors.decode(errors='replace')}")
+            return None
+        return output
+
+
+transcriber = Transcriber()
@@ -0,0 +1,108 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from bot.services.balances import balance_service, INTMAX
+from bot.services.intmax_sessions import intmax_sessions
+from bot.services.key_cache import key_cache
+from bot.services.tx_watcher import tx_watcher
+from configuration import TRANSFER_BATCH_WINDOW, TRANSFER_BATCH_MAX
+from database.user_cache import CachedUser
+from services.singleton import SingletonMeta
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Batch:
+    user: CachedUser
+    transfers: List[Dict] = field(default_factory=list)
+    futures: List[asyncio.Future] = field(default_factory=list)
+    timer: Optional[asyncio.Task] = None
+
+
+class TransferBatcher(metaclass=SingletonMeta):
+    """
+    Coalesces IntMax transfers of one wallet into a single broadcast.
+
+    A transfer waits up to ``TRANSFER_BATCH_WINDOW`` seconds for others from the
+    same wallet, and a batch is sent early once it holds ``TRANSFER_BATCH_MAX``
+    transfers. ``submit_many`` sends a multi-recipient command right away. Every
+    caller gets the ``txTreeRoot`` of the broadcast that carried its transfer,
+    or the exception that failed it.
+    """
+
+    def __init__(self, window: float = TRANSFER_BATCH_WINDOW, max_size: int = TRANSFER_BATCH_MAX):
+        self.window = window
+        self.max_size = max_size
+        self._batches: Dict[int, _Batch] = {}
+        self._broadcasts: Set[asyncio.Task] = set()
+
+    async def submit(self, user: CachedUser, address: str, amount: str, token: Dict) -> str:
+        [future] = self._add(user, [(address, amount)], token)
+        batch = self._batches.get(user.telegram_id)
+        if batch is not None and batch.timer is None:
+            batch.timer = asyncio.create_task(self._flush_later(user.telegram_id))
+        return await future
+
+    async def submit_many(self, user: CachedUser, recipients: Sequence[Tuple[str, str]], token: Dict) -> List[str]:
+        """Send to all ``recipients`` now; returns the distinct roots, more than one above ``max_size``."""
+        futures = self._add(user, recipients, token)
+        self._flush_now(user.telegram_id)
+        results = await asyncio.gather(*futures)
+        return list(dict.fromkeys(results))
+
+    def _add(self, user: CachedUser, recipients: Sequence[Tuple[str, str]], token: Dict) -> List[asyncio.Future]:
+        loop = asyncio.get_running_loop()
+        futures = []
+        for address, amount in recipients:
+            batch = self._batches.get(user.telegram_id)
+            if batch is None:
+                batch = self._batches[user.telegram_id] = _Batch(user=user)
+            future = loop.create_future()
+            batch.transfers.append({'address': address, 'amount': amount, 'token': token})
+            batch.futures.append(future)
+            futures.append(future)
+            if len(batch.transfers) >= self.max_size:
+                self._flush_now(user.telegram_id)
+        return futures
+
+    async def _flush_later(self, telegram_id: int) -> None:
+        await asyncio.sleep(self.window)
+        self._flush_now(telegram_id)
+
+    def _flush_now(self, telegram_id: int) -> None:
+        batch = self._batches.pop(telegram_id, None)
+        if batch is None:
+            return
+        if batch.timer is not None and batch.timer is not asyncio.current_task():
+            batch.timer.cancel()
+        # Runs detached so a caller that gives up cannot cancel the broadcast for the others
+        task = asyncio.create_task(self._broadcast(batch))
+        self._broadcasts.add(task)
+        task.add_done_callback(self._broadcasts.discard)
+
+    @staticmethod
+    async def _broadcast(batch: _Batch) -> None:
+        user = batch.user
+        try:
+            private_key = await key_cache.load_private_key(user.keystore)
+            async with intmax_sessions.session(f'0x{private_key}') as connector:
+                res = await connector.broadcast_transaction(transfers=batch.transfers)
+            tx_tree_root = res['tx']['txTreeRoot']
+        except Exception as e:
+            logger.warning(f"Broadcast of {len(batch.transfers)} transfers for {user.telegram_id} failed: {e}")
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        logger.info(f"Broadcast {len(batch.transfers)} transfers for {user.telegram_id}: {tx_tree_root}")
+        for future in batch.futures:
+            if not future.done():
+                future.set_result(tx_tree_root)
+        await balance_service.invalidate(user.wallet_address)
+        await tx_watcher.watch(user.telegram_id, INTMAX, tx_tree_root, 'transfer', user.wallet_address)
+
+
+transfer_batcher = TransferBatcher()
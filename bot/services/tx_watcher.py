@@ -0,0 +1,193 @@
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+
+from bot.services.balances import balance_service, ETHEREUM, INTMAX
+from bot.services.intmax_sessions import intmax_sessions
+from bot.services.key_cache import key_cache
+from bot.services.nonce_manager import nonce_manager
+from bot.services.redis_client import redis_client
+from bot.services.web3_pool import web3_pool, RPCError
+from configuration import ua_config, TX_WATCH_INTERVAL, TX_WATCH_TIMEOUT, TX_WATCH_CONCURRENCY, TX_WATCH_BATCH_SIZE
+from database.connector import DbConnector
+from services.outbox import outbox
+from services.singleton import SingletonMeta
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = "txwatch:pending"
+INTMAX_SUCCESS = ("success", "completed")
+INTMAX_FAILURE = ("failed", "rejected", "timeout")
+
+
+@dataclass
+class WatchedTx:
+    telegram_id: int
+    network: str
+    txid: str
+    # Shown to the user: "transfer", "deposit" or "withdrawal"
+    kind: str
+    address: str
+    recipient: Optional[str] = None
+    created_at: float = 0.0
+
+    @property
+    def field(self) -> str:
+        return f"{self.network}:{self.txid}"
+
+
+def normalize_hash(txid: str) -> str:
+    txid = txid.lower()
+    return txid if txid.startswith("0x") else f"0x{txid}"
+
+
+class TxWatcher(metaclass=SingletonMeta):
+    """
+    Follows sent transactions until they land and tells their senders.
+
+    Pending transactions live in one Redis hash, so they survive restarts.
+    Every tick asks the node for the L1 receipts in JSON-RPC batches of
+    ``TX_WATCH_BATCH_SIZE`` and reads the IntMax history once per wallet with
+    pending transfers, through ephemeral sessions that leave the session pool
+    alone, so the polling cost depends on the number of pending transactions
+    only. A settled transaction is announced through the outbox and drops the
+    cached balances; an L1 transaction that times out also resets the sender's
+    nonce counter.
+    """
+
+    def __init__(
+        self, interval: int = TX_WATCH_INTERVAL, timeout: int = TX_WATCH_TIMEOUT, batch_size: int = TX_WATCH_BATCH_SIZE
+    ):
+        self.interval = interval
+        self.timeout = timeout
+        self.batch_size = batch_size
+
+    async def watch(
+        self, telegram_id: int, network: str, txid: str, kind: str, address: str, recipient: Optional[str] = None
+    ) -> None:
+        if network == ETHEREUM:
+            txid = normalize_hash(txid)
+        tx = WatchedTx(
+            telegram_id=telegram_id, network=network, txid=txid, kind=kind,
+            address=address, recipient=recipient, created_at=time.time(),
+        )
+        try:
+            await redis_client.hset(PENDING_KEY, tx.field, json.dumps(asdict(tx)))
+        except Exception as e:
+            logger.warning(f"Could not watch {network} transaction {txid}: {e}")
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Transaction watcher tick failed: {e!r}")
+            await asyncio.sleep(self.interval)
+
+    async def tick(self) -> None:
+        pending = [WatchedTx(**json.loads(raw)) for raw in (await redis_client.hgetall(PENDING_KEY)).values()]
+        if not pending:
+            return
+        await asyncio.gather(
+            self._check_l1([tx for tx in pending if tx.network == ETHEREUM]),
+            self._check_intmax([tx for tx in pending if tx.network == INTMAX]),
+        )
+
+    async def _check_l1(self, pending: List[WatchedTx]) -> None:
+        for start in range(0, len(pending), self.batch_size):
+            chunk = pending[start:start + self.batch_size]
+            try:
+                receipts = await web3_pool.batch([("eth_getTransactionReceipt", [tx.txid]) for tx in chunk])
+            except Exception as e:
+                logger.warning(f"Receipt batch of {len(chunk)} failed: {e!r}")
+                continue
+            await self._apply_receipts(chunk, receipts)
+
+    async def _apply_receipts(self, txs: List[WatchedTx], receipts: List) -> None:
+        for tx, receipt in zip(txs, receipts):
+            if isinstance(receipt, RPCError):
+                logger.warning(f"Receipt lookup failed for {tx.txid}: {receipt}")
+            elif receipt is None:
+                await self._expire_if_old(tx)
+            else:
+                await self._settle(tx, succeeded=receipt.get("status") == "0x1")
+
+    async def _check_intmax(self, pending: List[WatchedTx]) -> None:
+        by_user: Dict[int, List[WatchedTx]] = defaultdict(list)
+        for tx in pending:
+            by_user[tx.telegram_id].append(tx)
+        slots = asyncio.Semaphore(TX_WATCH_CONCURRENCY)
+
+        async def check_user(telegram_id: int, txs: List[WatchedTx]) -> None:
+            async with slots:
+                try:
+                    statuses = await self._intmax_statuses(telegram_id)
+                except Exception as e:
+                    logger.warning(f"IntMax history lookup failed for {telegram_id}: {e}")
+                    # A wallet that keeps failing must not keep its transfers pending forever
+                    for tx in txs:
+                        await self._expire_if_old(tx)
+                    return
+            for tx in txs:
+                status = statuses.get(tx.txid)
+                if status in INTMAX_SUCCESS:
+                    await self._settle(tx, succeeded=True)
+                elif status in INTMAX_FAILURE:
+                    await self._settle(tx, succeeded=False)
+                else:
+                    await self._expire_if_old(tx)
+
+        await asyncio.gather(*(check_user(telegram_id, txs) for telegram_id, txs in by_user.items()))
+
+    @staticmethod
+    async def _intmax_statuses(telegram_id: int) -> Dict[str, str]:
+        user = await DbConnector().get_user(telegram_id=telegram_id)
+        private_key = await key_cache.load_private_key(user.keystore)
+        async with intmax_sessions.ephemeral(f'0x{private_key}') as connector:
+            res = await connector.get_transactions()
+        txs = res.get("txs") or []
+        items = txs.get("items", []) if isinstance(txs, dict) else txs
+        statuses = {}
+        for item in items:
+            status = str(item.get("status", "")).lower()
+            for ref in (item.get("txTreeRoot"), item.get("digest")):
+                if ref:
+                    statuses[ref] = status
+        return statuses
+
+    async def _settle(self, tx: WatchedTx, succeeded: bool) -> None:
+        await redis_client.hdel(PENDING_KEY, tx.field)
+        await balance_service.invalidate(tx.address)
+        if tx.recipient:
+            await balance_service.invalidate(tx.recipient, tx.network)
+        if tx.network == ETHEREUM:
+            for sent in nonce_manager.pending(tx.address):
+                if normalize_hash(sent.tx_hash) == tx.txid:
+                    nonce_manager.confirm(tx.address, sent.nonce)
+        await self._notify(tx, 'tx_confirmed' if succeeded else 'tx_failed')
+
+    async def _expire_if_old(self, tx: WatchedTx) -> None:
+        if time.time() - tx.created_at < self.timeout:
+            return
+        await redis_client.hdel(PENDING_KEY, tx.field)
+        if tx.network == ETHEREUM:
+            # Most likely dropped from the mempool, so the local counter is ahead of the chain
+            await nonce_manager.invalidate(tx.address)
+        await self._notify(tx, 'tx_unconfirmed')
+
+    @staticmethod
+    async def _notify(tx: WatchedTx, string: str) -> None:
+        network = "Ethereum" if tx.network == ETHEREUM else "INTMAX"
+        await outbox.send(
+            tx.telegram_id,
+            ua_config.get('transactions', string).format(kind=tx.kind, network=network, txid=tx.txid),
+        )
+
+
+tx_watcher = TxWatcher()
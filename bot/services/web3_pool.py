@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import itertools
+from typing import Any, Dict, List, Sequence, Tuple, Union
+
+import aiohttp
+from web3 import AsyncWeb3, AsyncHTTPProvider
+
+from configuration import L1_RPC_URL, WEB3_POOL_LIMIT, WEB3_REQUEST_TIMEOUT
+from services.singleton import SingletonMeta
+
+logger = logging.getLogger(__name__)
+
+
+class RPCError(Exception):
+    """Error object returned by the node for one call of a JSON-RPC batch."""
+
+    def __init__(self, error: Dict[str, Any]):
+        super().__init__(f"{error.get('code')}: {error.get('message')}")
+        self.code = error.get('code')
+        self.data = error.get('data')
+
+
+class Web3Pool(metaclass=SingletonMeta):
+    """
+    One ``AsyncWeb3`` client per RPC url, all backed by pooled keep-alive HTTP sessions.
+
+    Chain metadata that never changes for an endpoint (``chain_id``) is fetched
+    once and cached here, so callers only pay for the RPCs they really need.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, AsyncWeb3] = {}
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._chain_ids: Dict[str, int] = {}
+        self._lock = asyncio.Lock()
+        self._request_ids = itertools.count(1)
+
+    async def get(self, rpc_url: str = L1_RPC_URL) -> AsyncWeb3:
+        w3 = self._clients.get(rpc_url)
+        if w3 is not None:
+            return w3
+        async with self._lock:
+            if rpc_url not in self._clients:
+                provider = AsyncHTTPProvider(rpc_url)
+                await provider.cache_async_session(self.session(rpc_url))
+                self._clients[rpc_url] = AsyncWeb3(provider)
+        return self._clients[rpc_url]
+
+    def session(self, rpc_url: str = L1_RPC_URL) -> aiohttp.ClientSession:
+        """Pooled HTTP session for ``rpc_url``, also usable for raw JSON-RPC calls."""
+        session = self._sessions.get(rpc_url)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=WEB3_POOL_LIMIT, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=WEB3_REQUEST_TIMEOUT),
+            )
+            self._sessions[rpc_url] = session
+        return session
+
+    async def batch(
+        self, calls: Sequence[Tuple[str, list]], rpc_url: str = L1_RPC_URL
+    ) -> List[Union[Any, RPCError]]:
+        """
+        Send ``(method, params)`` calls as one JSON-RPC batch request.
+
+        Results come back in the order of ``calls``; a call the node rejected is
+        returned as an ``RPCError`` instead of failing the whole batch.
+        """
+        ids = [next(self._request_ids) for _ in calls]
+        payload = [
+            {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+            for request_id, (method, params) in zip(ids, calls)
+        ]
+        async with self.session(rpc_url).post(rpc_url, json=payload) as response:
+            response.raise_for_status()
+            replies = await response.json(content_type=None)
+        if not isinstance(replies, list):
+            # Providers without batch support answer with a single error object
+            raise RPCError(replies.get('error', {}) if isinstance(replies, dict) else {'message': str(replies)})
+        by_id = {reply.get('id'): reply for reply in replies}
+        results = []
+        for request_id in ids:
+            reply = by_id.get(request_id)
+            if reply is None:
+                results.append(RPCError({'message': 'missing from batch response'}))
+            elif 'error' in reply:
+                results.append(RPCError(reply['error']))
+            else:
+                results.append(reply.get('result'))
+        return results
+
+    async def chain_id(self, rpc_url: str = L1_RPC_URL) -> int:
+        if rpc_url not in self._chain_ids:
+            w3 = await self.get(rpc_url)
+            async with self._lock:
+                if rpc_url not in self._chain_ids:
+                    self._chain_ids[rpc_url] = await w3.eth.chain_id
+        return self._chain_ids[rpc_url]
+
+    async def close(self) -> None:
+        for session in self._sessions.values():
+            if not session.closed:
+                await session.close()
+        self._sessions.clear()
+        self._clients.clear()
+
+
+web3_pool = Web3Pool()
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+from typing import List
+
+from bot.services.balances import balance_service
+from bot.services.intmax_sessions import intmax_sessions
+from bot.services.key_cache import key_cache
+from bot.services.redis_client import redis_client
+from configuration import (
+    ua_config, CLAIM_INTERVAL, CLAIM_BATCH_SIZE, CLAIM_CONCURRENCY, CLAIM_CHUNK_SIZE, CLAIM_MAX_BACKOFF
+)
+from database.connector import DbConnector
+from services.outbox import outbox
+from services.singleton import SingletonMeta
+
+logger = logging.getLogger(__name__)
+
+WALLETS_KEY = "claimer:wallets"
+CURSOR_KEY = "claimer:cursor"
+BACKFILL_CURSOR_KEY = "claimer:backfill:cursor"
+BACKFILL_DONE_KEY = "claimer:backfill:done"
+# Withdrawal states the sidecar reports until a withdrawal is claimed or failed
+OPEN_STATES = ("needClaim", "requested", "relayed")
+
+
+class WithdrawalClaimer(metaclass=SingletonMeta):
+    """
+    Periodically claims IntMax withdrawals that are ready on L1.
+
+    Only wallets that withdrew are checked: ``track`` adds the user to a Redis
+    set, and a wallet leaves it again once it has no open withdrawal left. The
+    set is seeded once with every wallet, so withdrawals made before tracking
+    existed are claimed too. A pass goes over the set in batches of
+    ``CLAIM_BATCH_SIZE``, checking up to ``CLAIM_CONCURRENCY`` wallets at a time
+    through ephemeral sessions that do not enter the session pool, and claims
+    ``CLAIM_CHUNK_SIZE`` withdrawals per request. Both the seeding and a pass
+    store the last finished batch in Redis, so a restart continues where it
+    stopped. Sidecar errors grow a shared delay, doubling up to
+    ``CLAIM_MAX_BACKOFF`` seconds, that every worker waits before its next
+    wallet; one success resets it.
+    """
+
+    def __init__(self, interval: int = CLAIM_INTERVAL):
+        self.interval = interval
+        self._backoff = 0.0
+
+    @staticmethod
+    async def track(telegram_id: int) -> None:
+        """Have the next passes check ``telegram_id`` until its withdrawals are claimed."""
+        try:
+            await redis_client.sadd(WALLETS_KEY, telegram_id)
+        except Exception as e:
+            logger.warning(f"Could not track withdrawals of {telegram_id}: {e}")
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.scan()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Withdrawal claim pass failed: {e!r}")
+            await asyncio.sleep(self.interval)
+
+    @staticmethod
+    async def backfill() -> None:
+        """Add every wallet to the tracked set once, resuming a stored cursor."""
+        if await redis_client.get(BACKFILL_DONE_KEY):
+            return
+        cursor = await redis_client.get(BACKFILL_CURSOR_KEY)
+        batch = []
+        users = DbConnector().iter_users(
+            columns=("telegram_id",),
+            batch_size=CLAIM_BATCH_SIZE,
+            after=int(cursor) if cursor else None,
+            with_wallet=True,
+        )
+        async for row in users:
+            batch.append(row.telegram_id)
+            if len(batch) == CLAIM_BATCH_SIZE:
+                await redis_client.sadd(WALLETS_KEY, *batch)
+                await redis_client.set(BACKFILL_CURSOR_KEY, batch[-1])
+                batch = []
+        if batch:
+            await redis_client.sadd(WALLETS_KEY, *batch)
+        await redis_client.set(BACKFILL_DONE_KEY, 1)
+        await redis_client.delete(BACKFILL_CURSOR_KEY)
+        logger.info("Withdrawal claimer backfill finished")
+
+    async def scan(self) -> int:
+        """Run one pass over the tracked wallets, resuming a stored cursor, and return how many were claimed."""
+        await self.backfill()
+        cursor = await redis_client.get(CURSOR_KEY)
+        telegram_ids = sorted(int(telegram_id) for telegram_id in await redis_client.smembers(WALLETS_KEY))
+        if cursor:
+            telegram_ids = [telegram_id for telegram_id in telegram_ids if telegram_id > int(cursor)]
+        claimed = 0
+        for start in range(0, len(telegram_ids), CLAIM_BATCH_SIZE):
+            batch = telegram_ids[start:start + CLAIM_BATCH_SIZE]
+            claimed += await self._process_batch(batch)
+            await redis_client.set(CURSOR_KEY, batch[-1])
+        await redis_client.delete(CURSOR_KEY)
+        if claimed:
+            logger.info(f"Claimed {claimed} withdrawals")
+        return claimed
+
+    async def _process_batch(self, telegram_ids: List[int]) -> int:
+        slots = asyncio.Semaphore(CLAIM_CONCURRENCY)
+
+        async def process(telegram_id: int) -> int:
+            async with slots:
+                if self._backoff:
+                    await asyncio.sleep(self._backoff)
+                try:
+                    claimed = await self.claim_for(telegram_id)
+                except Exception as e:
+                    self._backoff = min(CLAIM_MAX_BACKOFF, max(1.0, self._backoff * 2))
+                    logger.warning(f"Claim failed for {telegram_id}, backing off {self._backoff}s: {e}")
+                    return 0
+                self._backoff = 0.0
+                return claimed
+
+        return sum(await asyncio.gather(*(process(telegram_id) for telegram_id in telegram_ids)))
+
+    @staticmethod
+    async def claim_for(telegram_id: int) -> int:
+        user = await DbConnector().get_user(telegram_id=telegram_id)
+        if user is None or not user.keystore:
+            await redis_client.srem(WALLETS_KEY, telegram_id)
+            return 0
+        private_key = await key_cache.load_private_key(user.keystore)
+        async with intmax_sessions.ephemeral(f'0x{private_key}') as connector:
+            res = await connector.get_pending_withdrawals()
+            pending = res.get('pending') or {}
+            need_claim = pending.get('needClaim') or []
+            for start in range(0, len(need_claim), CLAIM_CHUNK_SIZE):
+                await connector.claim_withdrawals(need_claim[start:start + CLAIM_CHUNK_SIZE])
+        if not any(pending.get(state) for state in OPEN_STATES):
+            await redis_client.srem(WALLETS_KEY, telegram_id)
+        if need_claim:
+            await balance_service.invalidate(user.wallet_address)
+            await outbox.send(
+                telegram_id, ua_config.get('transactions', 'withdrawal_claimed').format(count=len(need_claim))
+            )
+        return len(need_claim)
+
+
+withdrawal_claimer = WithdrawalClaimer()
@@ -1,18 +1,76 @@
-from typing import Tuple
+import json
+import logging
+import re
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
 
 from openai import AsyncOpenAI
 
-from bot.utils.message_generator import generate_contacts
-from configuration import OPENAI_API_KEY
+from bot.services.contact_cache import contact_cache, ContactEntry, ContactList
+from bot.utils.intent_parser import intent_parser, split_recipients
+from configuration import OPENAI_API_KEY, OPENAI_INTENT_MODEL, OPENAI_FALLBACK_MODEL
 from database.connector import DbConnector
 
-client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+logger = logging.getLogger(__name__)
 
+client = AsyncOpenAI(api_key=OPENAI_API_KEY)
 
-async def understand_action(input_message: str, telegram_id: int) -> Tuple[str, str, str, str, str]:
-    content = await get_response_from_model(input_message, telegram_id)
-    await DbConnector.add_message(telegram_id=telegram_id, content=content, role="assistant", mtype="ai-response")
-    return parse_ai_response(content)
+ACTIONS = ("TRANSFER", "SEND_INVOICE", "DEPOSIT", "WITHDRAW", "ERROR")
+NETWORKS = ("Ethereum", "Intmax")
+ERROR_INTENT = ("ERROR", "ERROR", "ERROR", "ERROR", "ERROR")
+
+INTENT_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "wallet_intent",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "action": {"type": "string", "enum": list(ACTIONS)},
+                "contact_name": {"type": "string"},
+                "contact_address": {"type": "string"},
+                "amount": {"type": "string"},
+                "network": {"type": "string", "enum": list(NETWORKS)},
+            },
+            "required": ["action", "contact_name", "contact_address", "amount", "network"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+# Kept byte-identical between requests so the provider can reuse its prompt cache;
+# everything user specific goes into later messages.
+SYSTEM_PROMPT = """
+Extract the intent of a Web3 wallet user's message.
+- action: TRANSFER (send funds to someone), SEND_INVOICE (request a payment), DEPOSIT (into INTMAX), WITHDRAW (out of INTMAX), ERROR if unclear.
+- contact_name, contact_address: the recipient copied exactly from the contact list, ERROR if absent or not needed. Several recipients: comma-separated names and addresses in the same order.
+- amount: number and symbol, e.g. "0.03 ETH". No currency given means USDC. ERROR if missing.
+- network: Ethereum or Intmax, Intmax if not mentioned.
+"""
+
+
+async def understand_action(
+    input_message: str,
+    telegram_id: int,
+    on_progress: Optional[Callable[[Dict[str, str]], Awaitable[None]]] = None,
+) -> Tuple[str, str, str, str, str]:
+    contact_list = await contact_cache.get(telegram_id)
+    parsed = intent_parser.parse(input_message, contact_list.contacts)
+    if parsed is not None:
+        action, username, address, amount, network = parsed
+        content = f"1. {action}\n2. {username};{address}\n3. {amount}\n4. {network}"
+        await DbConnector.add_message(telegram_id=telegram_id, content=content, role="assistant", mtype="local-intent")
+        return parsed
+
+    # The cheap model answers almost everything, the large one only sees what fails validation
+    for model in (OPENAI_INTENT_MODEL, OPENAI_FALLBACK_MODEL):
+        content = await get_response_from_model(input_message, contact_list, model=model, on_progress=on_progress)
+        await DbConnector.add_message(telegram_id=telegram_id, content=content, role="assistant", mtype="ai-response")
+        try:
+            return parse_ai_response(content, contact_list.contacts)
+        except ValueError as e:
+            logger.info(f"Model {model} returned an invalid intent: {e}")
+    return ERROR_INTENT
 
 
 async def transcribe_audio(buffer: bytes, telegram_id: int) -> str:
@@ -25,94 +83,101 @@ async def transcribe_audio(buffer: bytes, telegram_id: int) -> str:
     return transcription.text
 
 
-async def generate_prompt_message(telegram_id: int) -> str:
-    contact_list = await generate_contacts(telegram_id=telegram_id)
-    prompt = f"""
-    You are a smart assistant in a Web3 wallet application.
-
-    Your primary task is to interpret user intent based on a provided input message. From the user's natural language text, you should extract key actionable information and return your result in a strictly structured format.
-
-    === Output Format ===
-    Always return the result in this format:
-    1. ACTION
-    2. CONTACT_NAME;CONTACT_ADDRESS
-    3. AMOUNT
-    4. NETWORK
-
-    === Interpretation Rules ===
-
-    1. ACTION
-    - Determine what the user wants to do. Match to one of the following options:
-      - TRANSFER – if the user wants to send tokens or crypto assets to someone.
-      - SEND_INVOICE – if the user wants to issue or request payment via invoice.
-      - DEPOSIT - if the user wants to make deposit to INTMAX network
-      - WITHDRAW - if the user wants to withdraw from INTMAX network
-    - If you cannot confidently detect an action — return ERROR.
-
-    2. CONTACT_NAME;CONTACT_ADDRESS
-    - Identify the recipient from the message using the provided contact list.
-    - Match based on names, nicknames, or contextual references.
-    - Return in format: name;address (e.g. Alice;0x123...).
-    - If the recipient cannot be found — return ERROR;ERROR.
-
-    3. AMOUNT
-    - Extract the amount to be transferred or invoiced.
-    - If the user mentions a value without specifying the currency (e.g. "send 50"), you must assume the currency is USDC.
-    - Return the amount in numeric and symbolic format (e.g. 0.03 ETH, 200 USDC).
-    - If the amount is missing or unclear — return ERROR.
-
-    4. NETWORK
-    - Determine the blockchain network.
-    - Options: Ethereum, Intmax
-    - If not mentioned — return Intmax as the default.
-
-    === Guidance ===
-    - Do not invent contact names or addresses. Only use those from the provided contact list.
-    - Use best-effort inference if the user is informal or vague (e.g., “Send John some ETH”).
-    - If any part is missing or cannot be confidently extracted — return ERROR for that part.
-    - Always return all 4 lines of output, even if some are ERROR.
-
-    === Example ===
-    User message: "Send 0.5 ETH to Kate on Ethereum"
-    Your response:
-    1. TRANSFER
-    2. Kate;0xabc123...
-    3. 0.5 ETH
-    4. Ethereum
-
-    Contacts will be provided under {contact_list}.
-    """
-    return prompt
-
-
-async def generate_valid_input(input_message: str, telegram_id: str) -> list[dict]:
-    prompt = await generate_prompt_message(telegram_id)
+def generate_valid_input(input_message: str, contact_list: ContactList) -> list[dict]:
     messages = [
-        {"role": "system", "content": prompt},
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "system", "content": f"Contacts (name;address):\n{contact_list.prompt or 'No contacts'}"},
         {"role": "user", "content": input_message},
     ]
     return messages
 
 
-async def get_response_from_model(input_message: str, telegram_id: str, model: str = "gpt-4.1-2025-04-14") -> str:
-    messages = await generate_valid_input(input_message, telegram_id)
+class IntentStream:
+    """
+    Picks completed ``"field": "value"`` pairs out of a streamed JSON answer.
+
+    Only the text after the last completed pair is kept and re-scanned, so
+    feeding the whole stream costs linear time no matter how it is chunked.
+    """
+
+    FIELD_RE = re.compile(r'"(\w+)"\s*:\s*"((?:[^"\\]|\\.)*)"')
+    FIELDS = ("action", "contact_name", "contact_address", "amount", "network")
+
+    def __init__(self):
+        self.fields: Dict[str, str] = {}
+        self._parts: List[str] = []
+        self._pending = ""
+
+    def feed(self, chunk: str) -> bool:
+        """Consume a chunk, returning whether a new field was completed."""
+        self._parts.append(chunk)
+        self._pending += chunk
+        found = False
+        end = 0
+        for match in self.FIELD_RE.finditer(self._pending):
+            self.fields[match.group(1)] = json.loads(f'"{match.group(2)}"')
+            end = match.end()
+            found = True
+        if found:
+            self._pending = self._pending[end:]
+        return found
+
+    @property
+    def complete(self) -> bool:
+        return all(field in self.fields for field in self.FIELDS)
+
+    @property
+    def content(self) -> str:
+        if self.complete:
+            return json.dumps({field: self.fields[field] for field in self.FIELDS})
+        return "".join(self._parts)
+
+
+async def get_response_from_model(
+    input_message: str,
+    contact_list: ContactList,
+    model: str = OPENAI_INTENT_MODEL,
+    on_progress: Optional[Callable[[Dict[str, str]], Awaitable[None]]] = None,
+) -> str:
+    messages = generate_valid_input(input_message, contact_list)
     stream = await client.chat.completions.create(
         model=model,
         messages=messages,
+        response_format=INTENT_RESPONSE_FORMAT,
         stream=True,
     )
-    content = ''
-    async for chunk in stream:
-        if chunk.choices[0].delta.content is not None:
-            content += chunk.choices[0].delta.content or ""
-
-    return content
-
-def parse_ai_response(response: str) -> Tuple[str, str, str, str, str]:
-    action, contact, amount, network = response.split("\n")
-    action = action.replace('1. ', '')
-    contact = contact.replace('2. ', '')
-    username, address = contact.split(";")
-    amount = amount.replace('3. ', '')
-    network = network.replace('4. ', '')
-    return action, username, address, amount, network
\ No newline at end of file
+    intent = IntentStream()
+    try:
+        async for chunk in stream:
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            if intent.feed(chunk.choices[0].delta.content) and on_progress is not None:
+                await on_progress(dict(intent.fields))
+            if intent.complete:
+                # Everything we need is known, stop paying for the rest of the answer
+                break
+    finally:
+        await stream.close()
+    return intent.content
+
+
+def parse_ai_response(
+    response: str, contacts: Optional[Sequence[ContactEntry]] = None
+) -> Tuple[str, str, str, str, str]:
+    """Validate the model's JSON answer, raising ``ValueError`` when it cannot be trusted."""
+    try:
+        data = json.loads(response)
+        action, username, address = data["action"], data["contact_name"], data["contact_address"]
+        amount, network = data["amount"], data["network"]
+    except (json.JSONDecodeError, KeyError, TypeError) as e:
+        raise ValueError(f"malformed response: {e}") from e
+    if action not in ACTIONS:
+        raise ValueError(f"unknown action {action!r}")
+    if network not in NETWORKS:
+        raise ValueError(f"unknown network {network!r}")
+    if contacts is not None and username != "ERROR":
+        known = {(contact.name, contact.address) for contact in contacts}
+        for recipient in split_recipients(username, address):
+            if (recipient.name, recipient.address) not in known:
+                raise ValueError(f"contact {recipient.name!r} is not in the contact list")
+    return action, username, address, amount, network
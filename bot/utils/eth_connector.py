@@ -1,36 +1,109 @@
+import logging
+from typing import Optional
+
 from eth_account import Account
-from web3 import AsyncWeb3, AsyncHTTPProvider, Web3
-import asyncio
+from eth_account.signers.local import LocalAccount
+from web3 import AsyncWeb3, Web3
 
+from bot.services.gas_oracle import gas_oracle, bump_fees
+from bot.services.networks import ETHEREUM
+from bot.services.nonce_manager import nonce_manager
+from bot.services.redis_client import redis_client
+from bot.services.web3_pool import web3_pool
 from configuration import L1_RPC_URL
 
+logger = logging.getLogger(__name__)
+
+FEE_FIELDS = ('type', 'gasPrice', 'maxFeePerGas', 'maxPriorityFeePerGas')
+
 
 class ETHConnector:
-    def __init__(self, private_key_hex: str):
-        key = (
-            private_key_hex[2:] if private_key_hex.startswith("0x") else private_key_hex
-        )
-        self.w3 = AsyncWeb3(AsyncHTTPProvider(L1_RPC_URL))
-        self.account = Account.from_key(bytes.fromhex(key))
-        self.address = self.account.address
+    """
+    L1 wallet operations on top of the shared ``web3_pool`` connection.
+
+    The signing account is optional: read-only calls such as ``get_balance``
+    only need an address, so callers that already know it can skip the key.
+    """
+
+    def __init__(
+        self,
+        private_key_hex: Optional[str] = None,
+        address: Optional[str] = None,
+        rpc_url: str = L1_RPC_URL,
+    ):
+        self.rpc_url = rpc_url
+        self.account: Optional[LocalAccount] = None
+        if private_key_hex is not None:
+            key = (
+                private_key_hex[2:] if private_key_hex.startswith("0x") else private_key_hex
+            )
+            self.account = Account.from_key(bytes.fromhex(key))
+            address = self.account.address
+        if address is None:
+            raise ValueError("ETHConnector needs a private key or an address")
+        self.address = Web3.to_checksum_address(address)
+
+    async def _w3(self) -> AsyncWeb3:
+        return await web3_pool.get(self.rpc_url)
 
     async def get_balance(self) -> float:
-        bal = await self.w3.eth.get_balance(self.address)
+        w3 = await self._w3()
+        bal = await w3.eth.get_balance(self.address)
         return Web3.from_wei(bal, "ether")
 
     async def send_native(self, to_address: str, amount: float, gas_price_gwei: float = None) -> str:
-        nonce = await self.w3.eth.get_transaction_count(self.address)
-        print(to_address, amount)
-        chain_id = await self.w3.eth.chain_id
+        if self.account is None:
+            raise ValueError("Sending requires a connector created with a private key")
+        w3 = await self._w3()
+        if gas_price_gwei is not None:
+            fees = {'gasPrice': Web3.to_wei(gas_price_gwei, 'gwei')}
+        else:
+            fees = (await gas_oracle.suggest(self.rpc_url)).tx_fields()
         tx = {
-            'nonce': nonce,
             'to': Web3.to_checksum_address(to_address),
             'value': Web3.to_wei(amount, 'ether'),
-            'chainId': chain_id,
+            'chainId': await web3_pool.chain_id(self.rpc_url),
             'gas': 21000,
-            'gasPrice': Web3.to_wei(gas_price_gwei or 10, 'gwei')
+            **fees,
         }
+        try:
+            return await self._sign_and_send(w3, tx)
+        except Exception as e:
+            if not nonce_manager.is_nonce_too_low(e):
+                raise
+            # Someone else (another process, a wallet app) used our nonce: resync and retry once
+            await nonce_manager.resync(w3, self.address)
+            return await self._sign_and_send(w3, tx)
+
+    async def speed_up(self, nonce: int) -> str:
+        """Replace a stuck pending transaction with the same one at bumped fees."""
+        pending = nonce_manager.get_pending(self.address, nonce)
+        if pending is None:
+            raise ValueError(f"No pending transaction with nonce {nonce} for {self.address}")
+        w3 = await self._w3()
+        current = await gas_oracle.refresh(self.rpc_url)
+        tx = {key: value for key, value in pending.tx.items() if key not in FEE_FIELDS}
+        tx.update(bump_fees(pending.tx, current))
+        return await self._sign_and_send(w3, tx, nonce=nonce)
+
+    async def _sign_and_send(self, w3: AsyncWeb3, tx: dict, nonce: Optional[int] = None) -> str:
+        if nonce is None:
+            nonce = await nonce_manager.allocate(w3, self.address)
+        tx = {**tx, 'nonce': nonce}
         signed = self.account.sign_transaction(tx)
-        raw = signed.raw_transaction
-        h = await self.w3.eth.send_raw_transaction(raw)
+        try:
+            h = await w3.eth.send_raw_transaction(signed.raw_transaction)
+        except Exception:
+            # The nonce may or may not have been consumed, let the next send read it from the chain
+            await nonce_manager.invalidate(self.address)
+            raise
+        nonce_manager.track(self.address, tx['nonce'], h.hex(), tx)
+        await self._invalidate_balances(tx['to'])
         return h.hex()
+
+    async def _invalidate_balances(self, to_address: str) -> None:
+        try:
+            await redis_client.invalidate_balance(self.address, ETHEREUM)
+            await redis_client.invalidate_balance(to_address, ETHEREUM)
+        except Exception as e:
+            logger.warning(f"Balance cache invalidation failed: {e}")
@@ -0,0 +1,125 @@
+import logging
+import re
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import List, Optional, Sequence, Tuple
+
+from bot.services.contact_cache import ContactEntry
+
+logger = logging.getLogger(__name__)
+
+ACTION_PATTERNS = (
+    ("DEPOSIT", re.compile(r"\b(deposit\w*|депозит\w*|поповн\w*)", re.IGNORECASE)),
+    ("WITHDRAW", re.compile(r"\b(withdraw\w*|вивест\w*|виведи|вивід\w*)", re.IGNORECASE)),
+    ("TRANSFER", re.compile(r"\b(send|transfer|pay|надішли|відправ\w*|переказ\w*|скинь|перекинь)\b", re.IGNORECASE)),
+)
+AMOUNT_RE = re.compile(r"(?<![\w.,])(\d+(?:[.,]\d+)?)\s*(eth|ether|usdc|ефір\w*)(?!\w)", re.IGNORECASE)
+UNITS = {"eth": "ETH", "ether": "ETH", "usdc": "USDC"}
+ETHEREUM_RE = re.compile(r"\b(ethereum|mainnet|l1|ефіріум\w*|етеріум\w*)\b", re.IGNORECASE)
+INTMAX_RE = re.compile(r"\b(intmax|інтмакс\w*)\b", re.IGNORECASE)
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+# "Kate, Bob and Alice": commas (but not decimal commas) and conjunctions separate recipients
+LIST_SEPARATOR_RE = re.compile(r",(?!\d)|\b(?:and|і|та|й)\b", re.IGNORECASE)
+# Several recipients travel through the 5-tuple as comma-separated names and addresses
+RECIPIENT_SEPARATOR = ","
+
+# Minimal similarity for a word of the message to count as a contact name
+CONTACT_MATCH_RATIO = 0.8
+# The best contact must beat the runner-up by this much, otherwise the match is ambiguous
+CONTACT_MATCH_MARGIN = 0.1
+
+
+@dataclass
+class IntentParserStats:
+    attempts: int = 0
+    hits: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.attempts if self.attempts else 0.0
+
+
+class IntentParser:
+    """
+    Deterministic parser for plain commands such as "send 0.01 ETH to Kate".
+
+    ``parse`` returns the same tuple as ``parse_ai_response`` when every field
+    is unambiguous and ``None`` otherwise, in which case the caller asks the model.
+    """
+
+    def __init__(self):
+        self.stats = IntentParserStats()
+
+    def parse(self, text: str, contacts: Sequence[ContactEntry]) -> Optional[Tuple[str, str, str, str, str]]:
+        self.stats.attempts += 1
+        result = self._parse(text, contacts)
+        if result is not None:
+            self.stats.hits += 1
+        if self.stats.attempts % 100 == 0:
+            logger.info(f"Local intent parser hit rate: {self.stats.hit_rate:.1%} of {self.stats.attempts}")
+        return result
+
+    def _parse(self, text: str, contacts: Sequence[ContactEntry]) -> Optional[Tuple[str, str, str, str, str]]:
+        actions = [action for action, pattern in ACTION_PATTERNS if pattern.search(text)]
+        if len(actions) != 1:
+            return None
+        action = actions[0]
+
+        amounts = AMOUNT_RE.findall(text)
+        if len(amounts) != 1:
+            return None
+        value, unit = amounts[0]
+        amount = f"{value.replace(',', '.')} {UNITS.get(unit.lower(), 'ETH')}"
+
+        mentions_ethereum = bool(ETHEREUM_RE.search(text))
+        mentions_intmax = bool(INTMAX_RE.search(text))
+        if mentions_ethereum and mentions_intmax:
+            return None
+        network = "Ethereum" if mentions_ethereum else "Intmax"
+
+        if action != "TRANSFER":
+            return action, "ERROR", "ERROR", amount, network
+
+        segments = LIST_SEPARATOR_RE.split(text)
+        matched = [self.match_contact(segment, contacts) for segment in segments]
+        if any(contact is None for contact in matched) or len(set(matched)) != len(matched):
+            return None
+        username, address = join_recipients(matched)
+        return action, username, address, amount, network
+
+    @staticmethod
+    def match_contact(text: str, contacts: Sequence[ContactEntry]) -> Optional[ContactEntry]:
+        """Best fuzzy match of a contact name against the words (and word pairs) of ``text``."""
+        words = [word.lower() for word in WORD_RE.findall(text)]
+        candidates = words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+        scored: List[Tuple[float, ContactEntry]] = []
+        for contact in contacts:
+            name = contact.name.lower()
+            score = max((SequenceMatcher(None, name, candidate).ratio() for candidate in candidates), default=0.0)
+            scored.append((score, contact))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        if not scored or scored[0][0] < CONTACT_MATCH_RATIO:
+            return None
+        if len(scored) > 1 and scored[0][0] - scored[1][0] < CONTACT_MATCH_MARGIN:
+            return None
+        return scored[0][1]
+
+
+def join_recipients(contacts: Sequence[ContactEntry]) -> Tuple[str, str]:
+    """Pack recipients into the ``(username, address)`` fields of an intent."""
+    return (
+        f"{RECIPIENT_SEPARATOR} ".join(contact.name for contact in contacts),
+        RECIPIENT_SEPARATOR.join(contact.address for contact in contacts),
+    )
+
+
+def split_recipients(username: str, address: str) -> List[ContactEntry]:
+    """Inverse of ``join_recipients``, a single recipient gives a one-element list."""
+    names = [name.strip() for name in username.split(RECIPIENT_SEPARATOR)]
+    addresses = [item.strip() for item in address.split(RECIPIENT_SEPARATOR)]
+    if len(names) != len(addresses):
+        raise ValueError(f"{len(names)} recipient names for {len(addresses)} addresses")
+    return [ContactEntry(name=name, address=item) for name, item in zip(names, addresses)]
+
+
+intent_parser = IntentParser()
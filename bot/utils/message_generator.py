@@ -1,49 +1,49 @@
-from database.connector import DbConnector
+from decimal import Decimal
+from typing import Optional
+
+from database.user_cache import CachedUser
 from configuration import ua_config
 
-from bot.utils.eth_accounts import WalletManager
-from bot.utils.eth_connector import ETHConnector
-from bot.utils.intmax_connector import IntMaxConnector
+from bot.services.balances import balance_service, BalanceSnapshot, ETHEREUM, INTMAX
+from bot.services.contact_cache import contact_cache
+
+
+def format_balance(balance: Optional[Decimal]) -> str:
+    if balance is None:
+        return ua_config.get('main', 'balance_unavailable')
+    return f'{balance.normalize():f}'
 
 
-async def generate_initial_message(telegram_id: int):
-    db_con = DbConnector()
-    user = await db_con.get_user(telegram_id=telegram_id)
-    private_key = WalletManager.load_private_key(user.keystore)
-    eth_con = ETHConnector(private_key_hex=private_key)
-    balance = await eth_con.get_balance()
+def render_wallet_message(snapshot: BalanceSnapshot) -> str:
     return ua_config.get('main', 'start_info').format(
-        balance=balance,
-        wallet_address=user.wallet_address
+        balance=format_balance(snapshot.l1),
+        wallet_address=snapshot.address
+    )
+
+
+def render_intmax_message(snapshot: BalanceSnapshot) -> str:
+    return ua_config.get('main', 'intmax_info').format(
+        intmax_address=snapshot.intmax_address or ua_config.get('main', 'balance_unavailable'),
+        intmax_balance=format_balance(snapshot.intmax),
+        l1_balance=format_balance(snapshot.l1),
     )
 
 
+async def generate_initial_message(user: CachedUser):
+    snapshot = await balance_service.snapshot(user, sources=(ETHEREUM,))
+    return render_wallet_message(snapshot)
+
+
 async def generate_contacts(telegram_id: int):
-    db_con = DbConnector()
-    contacts = await db_con.get_contacts(telegram_id=telegram_id)
+    contact_list = await contact_cache.get(telegram_id)
     contacts_text = []
-    for contact in contacts:
-        contacts_text.append(ua_config.get('contact', 'single_contact').format(contact_name=contact.contact_name, contact_address=contact.wallet_address))
+    for contact in contact_list.contacts:
+        contacts_text.append(ua_config.get('contact', 'single_contact').format(contact_name=contact.name, contact_address=contact.address))
     if len(contacts_text) == 0:
         return ua_config.get('contact', 'no_contacts')
     return '\n------------------------------------------\n'.join(contacts_text)
 
 
-async def generate_intmax_balance_message(telegram_id: int):
-    db_con = DbConnector()
-    user = await db_con.get_user(telegram_id=telegram_id)
-    private_key = WalletManager.load_private_key(user.keystore)
-    async with IntMaxConnector() as connector:
-        data = await connector.login(f'0x{private_key}')
-        balances = await connector.get_balances()
-    balances = balances['balances']
-    eth_balance = 0
-    for balance in balances:
-        if balance['token']['tokenIndex'] == 0:
-            eth_balance = float(balance['amount']) / float(pow(10, balance['token']['decimals']))
-    eth_con = ETHConnector(private_key_hex=private_key)
-    balance = await eth_con.get_balance()
-    return ua_config.get('main', 'start_info').format(
-        balance=eth_balance,
-        wallet_address=data['address']
-    )
+async def generate_intmax_balance_message(user: CachedUser):
+    snapshot = await balance_service.snapshot(user, sources=(ETHEREUM, INTMAX))
+    return render_intmax_message(snapshot)
@@ -0,0 +1,64 @@
+import logging
+import time
+from typing import Optional
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Message, InlineKeyboardMarkup
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressMessage:
+    """
+    A single bot message that is edited in place while a request is being processed.
+
+    Intermediate updates are throttled to one edit per ``min_interval`` seconds
+    to stay within Telegram's edit limits; ``finish`` always goes through, as a
+    reply when the message cannot be edited.
+    """
+
+    def __init__(self, message: Message, min_interval: float = 1.0):
+        self.message = message
+        self.min_interval = min_interval
+        self._last_text = message.text
+        self._last_edit = time.monotonic()
+
+    @classmethod
+    async def send(cls, reply_to: Message, text: str, min_interval: float = 1.0) -> "ProgressMessage":
+        return cls(await reply_to.reply(text), min_interval=min_interval)
+
+    async def update(self, text: str) -> None:
+        if time.monotonic() - self._last_edit < self.min_interval:
+            return
+        try:
+            await self._edit(text)
+        except TelegramBadRequest as e:
+            # An intermediate step is not worth failing the request over
+            logger.warning(f"Progress update failed: {e}")
+
+    async def finish(self, text: str, reply_markup: Optional[InlineKeyboardMarkup] = None) -> None:
+        """Show the final text, as a new reply if the message cannot be edited into it."""
+        try:
+            await self._edit(text, reply_markup=reply_markup, force=reply_markup is not None)
+            return
+        except TelegramBadRequest as e:
+            logger.warning(f"Progress finish failed, replying instead: {e}")
+        try:
+            self.message = await self.message.reply(text=text, reply_markup=reply_markup)
+        except TelegramBadRequest as e:
+            # Most often markup that is not valid HTML, such as a contact name with "<" in it
+            logger.warning(f"Progress reply failed, sending plain text: {e}")
+            self.message = await self.message.reply(text=text, reply_markup=reply_markup, parse_mode=None)
+        self._last_text = text
+
+    async def _edit(self, text: str, reply_markup: Optional[InlineKeyboardMarkup] = None, force: bool = False) -> None:
+        if text == self._last_text and not force:
+            return
+        self._last_edit = time.monotonic()
+        try:
+            await self.message.edit_text(text=text, reply_markup=reply_markup)
+        except TelegramBadRequest as e:
+            if "message is not modified" not in str(e):
+                raise
+            logger.debug(f"Progress edit skipped: {e}")
+        self._last_text = text
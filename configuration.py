@@ -6,6 +6,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 DB_URL = os.getenv('POSTGRES_URL')
+DB_ECHO = os.getenv('DB_ECHO', 'false').lower() in ('1', 'true', 'yes')
 
 BOT_TOKEN = os.getenv('TOKEN')
 
@@ -14,7 +15,85 @@ REDIS_PASSWORD = os.getenv('REDIS_PASSWORD')
 L1_RPC_URL = os.getenv('L1_RPC_URL')
 ENCRYPTION_PASSWORD = os.getenv('ENCRYPTION_PASSWORD')
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+OPENAI_INTENT_MODEL = os.getenv('OPENAI_INTENT_MODEL', 'gpt-4.1-mini')
+OPENAI_FALLBACK_MODEL = os.getenv('OPENAI_FALLBACK_MODEL', 'gpt-4.1-2025-04-14')
 INTMAX_BACKEND_URL = os.getenv('INTMAX_URL')
 
+KEY_CACHE_TTL = int(os.getenv('KEY_CACHE_TTL', 600))
+KEY_CACHE_SIZE = int(os.getenv('KEY_CACHE_SIZE', 1024))
+KEY_DECRYPT_WORKERS = int(os.getenv('KEY_DECRYPT_WORKERS', 2))
+
+INTMAX_SESSION_TTL = int(os.getenv('INTMAX_SESSION_TTL', 900))
+INTMAX_POOL_LIMIT = int(os.getenv('INTMAX_POOL_LIMIT', 100))
+INTMAX_KEEPALIVE_TIMEOUT = int(os.getenv('INTMAX_KEEPALIVE_TIMEOUT', 60))
+INTMAX_MAX_SESSIONS = int(os.getenv('INTMAX_MAX_SESSIONS', 500))
+
+WEB3_POOL_LIMIT = int(os.getenv('WEB3_POOL_LIMIT', 100))
+WEB3_REQUEST_TIMEOUT = int(os.getenv('WEB3_REQUEST_TIMEOUT', 30))
+
+# "memory" keeps nonce counters per process, "redis" shares them between bot processes
+NONCE_BACKEND = os.getenv('NONCE_BACKEND', 'memory')
+# Seconds without a send after which a wallet's nonce counter is re-read from the chain
+NONCE_TTL = int(os.getenv('NONCE_TTL', 600))
+# Sent transactions are kept for speed-ups and receipts for this long at most
+NONCE_PENDING_TTL = int(os.getenv('NONCE_PENDING_TTL', 3 * 3600))
+
+GAS_ORACLE_TTL = int(os.getenv('GAS_ORACLE_TTL', 12))
+GAS_ORACLE_INTERVAL = int(os.getenv('GAS_ORACLE_INTERVAL', 6))
+GAS_HISTORY_BLOCKS = int(os.getenv('GAS_HISTORY_BLOCKS', 10))
+GAS_PRIORITY_PERCENTILE = float(os.getenv('GAS_PRIORITY_PERCENTILE', 60))
+GAS_MIN_PRIORITY_GWEI = float(os.getenv('GAS_MIN_PRIORITY_GWEI', 0.1))
+
+USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 300))
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', 10000))
+
+MESSAGE_SINK_QUEUE_SIZE = int(os.getenv('MESSAGE_SINK_QUEUE_SIZE', 10000))
+MESSAGE_SINK_BATCH_SIZE = int(os.getenv('MESSAGE_SINK_BATCH_SIZE', 500))
+MESSAGE_SINK_FLUSH_INTERVAL = float(os.getenv('MESSAGE_SINK_FLUSH_INTERVAL', 1.0))
+
+CONTACT_CACHE_TTL = int(os.getenv('CONTACT_CACHE_TTL', 3600))
+
+TRANSCRIPTION_CACHE_TTL = int(os.getenv('TRANSCRIPTION_CACHE_TTL', 7 * 24 * 3600))
+AUDIO_MAX_DURATION = int(os.getenv('AUDIO_MAX_DURATION', 60))
+AUDIO_WORKERS = int(os.getenv('AUDIO_WORKERS', 2))
+FFMPEG_BINARY = os.getenv('FFMPEG_BINARY', 'ffmpeg')
+
+BALANCE_TIMEOUT = float(os.getenv('BALANCE_TIMEOUT', 8))
+# Cached balances are served as-is while fresher than BALANCE_CACHE_FRESH seconds, and served
+# while being refreshed in the background until BALANCE_CACHE_TTL seconds
+BALANCE_CACHE_FRESH = int(os.getenv('BALANCE_CACHE_FRESH', 15))
+BALANCE_CACHE_TTL = int(os.getenv('BALANCE_CACHE_TTL', 300))
+
+BULK_BALANCE_CHUNK_SIZE = int(os.getenv('BULK_BALANCE_CHUNK_SIZE', 100))
+BULK_BALANCE_CONCURRENCY = int(os.getenv('BULK_BALANCE_CONCURRENCY', 4))
+BULK_BALANCE_MULTICALL = os.getenv('BULK_BALANCE_MULTICALL', 'false').lower() in ('1', 'true', 'yes')
+
+OUTBOX_WORKERS = int(os.getenv('OUTBOX_WORKERS', 4))
+# Telegram allows about 30 messages per second overall and one per second in a private chat
+OUTBOX_GLOBAL_RATE = float(os.getenv('OUTBOX_GLOBAL_RATE', 25))
+OUTBOX_CHAT_RATE = float(os.getenv('OUTBOX_CHAT_RATE', 1))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 5))
+
+TX_WATCH_INTERVAL = int(os.getenv('TX_WATCH_INTERVAL', 10))
+TX_WATCH_TIMEOUT = int(os.getenv('TX_WATCH_TIMEOUT', 3 * 3600))
+TX_WATCH_CONCURRENCY = int(os.getenv('TX_WATCH_CONCURRENCY', 8))
+TX_WATCH_BATCH_SIZE = int(os.getenv('TX_WATCH_BATCH_SIZE', 100))
+
+CLAIM_INTERVAL = int(os.getenv('CLAIM_INTERVAL', 900))
+CLAIM_BATCH_SIZE = int(os.getenv('CLAIM_BATCH_SIZE', 50))
+CLAIM_CONCURRENCY = int(os.getenv('CLAIM_CONCURRENCY', 4))
+CLAIM_CHUNK_SIZE = int(os.getenv('CLAIM_CHUNK_SIZE', 20))
+CLAIM_MAX_BACKOFF = int(os.getenv('CLAIM_MAX_BACKOFF', 300))
+
+# Transfers of one wallet arriving within the window are broadcast together
+TRANSFER_BATCH_WINDOW = float(os.getenv('TRANSFER_BATCH_WINDOW', 1.5))
+TRANSFER_BATCH_MAX = int(os.getenv('TRANSFER_BATCH_MAX', 32))
+
+TOKEN_REFRESH_INTERVAL = int(os.getenv('TOKEN_REFRESH_INTERVAL', 3600))
+
+# Deposit gas estimates are shared per token and order of magnitude of the amount
+DEPOSIT_FEE_TTL = int(os.getenv('DEPOSIT_FEE_TTL', 120))
+DEPOSIT_FEE_TIMEOUT = float(os.getenv('DEPOSIT_FEE_TIMEOUT', 15))
+
 ua_config = configparser.ConfigParser()
 ua_config.read('bot/locales/ua/strings.ini')
@@ -0,0 +1,28 @@
+"""add telegram_id indexes to contacts and messages
+
+Revision ID: 5e2c1b7d9a40
+Revises: d969c0f44afa
+Create Date: 2026-10-18 10:12:31.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2c1b7d9a40'
+down_revision: Union[str, None] = 'd969c0f44afa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_contacts_telegram_id_contact_name', 'contacts', ['telegram_id', 'contact_name'], unique=False)
+    op.create_index('ix_messages_telegram_id_created_at', 'messages', ['telegram_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_messages_telegram_id_created_at', table_name='messages')
+    op.drop_index('ix_contacts_telegram_id_contact_name', table_name='contacts')
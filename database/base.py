@@ -5,10 +5,10 @@ from contextlib import asynccontextmanager
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
-from configuration import DB_URL  # Ensure DB_URL is updated for async, e.g., 'postgresql+asyncpg://...'
+from configuration import DB_URL, DB_ECHO  # Ensure DB_URL is updated for async, e.g., 'postgresql+asyncpg://...'
 
 # Create an asynchronous engine
-engine = create_async_engine(DB_URL, pool_size=15, max_overflow=30, echo=True)
+engine = create_async_engine(DB_URL, pool_size=15, max_overflow=30, echo=DB_ECHO)
 
 # Create an async sessionmaker
 AsyncSessionLocal = sessionmaker(
@@ -31,3 +31,10 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
             raise e
         finally:
             await session.close()
+
+
+@asynccontextmanager
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """Session for read-only queries: nothing to flush, so it is closed without a commit."""
+    async with AsyncSessionLocal() as session:
+        yield session
@@ -1,12 +1,15 @@
 import logging
-from typing import Optional, List
+from typing import AsyncIterator, Optional, List, Sequence, Union
 
-from sqlalchemy import update, insert
+from sqlalchemy import update, exists, Row
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.future import select
 
-from database.base import get_session
+from database.base import get_session, get_read_session
+from database.message_sink import message_sink
 from database.models.gpt import *
 from database.models.user import User, Contact
+from database.user_cache import CachedUser, user_cache
 from services.singleton import SingletonMeta
 
 logger = logging.getLogger(__name__)
@@ -17,35 +20,95 @@ class DbConnector(metaclass=SingletonMeta):
     Asynchronous Database abstraction
     """
 
-    async def get_or_create_user(self, telegram_id: int, username: Optional[str] = None) -> User:
-        async with get_session() as session:
-            result = await session.execute(
-                select(User).filter(User.telegram_id == telegram_id)
-            )
-            user = result.scalars().first()
-            if user is None:
-                user = User(telegram_id=telegram_id, username=username)
-                session.add(user)
-                await session.flush()
-            return user
+    async def get_or_create_user(self, telegram_id: int, username: Optional[str] = None) -> CachedUser:
+        """
+        Return the user, creating it or refreshing its username in a single statement.
+
+        A cache hit with an unchanged username costs no query at all, and the row
+        is only written when it is new or the username really changed.
+        """
+        cached = user_cache.get(telegram_id)
+        if cached is not None and cached.username == username:
+            return cached
 
-    async def get_user(self, telegram_id: int) -> Optional[User]:
+        users = User.__table__
+        insert_stmt = pg_insert(users).values(telegram_id=telegram_id, username=username)
+        upserted = (
+            insert_stmt.on_conflict_do_update(
+                index_elements=[users.c.telegram_id],
+                set_={"username": insert_stmt.excluded.username},
+                where=users.c.username.is_distinct_from(insert_stmt.excluded.username),
+            )
+            .returning(*users.c)
+            .cte("upserted")
+        )
+        # When nothing had to be written the CTE is empty and the existing row is read instead
+        stmt = select(upserted).union_all(
+            select(users).where(
+                users.c.telegram_id == telegram_id,
+                ~exists(select(upserted.c.telegram_id)),
+            )
+        )
         async with get_session() as session:
+            row = (await session.execute(stmt)).mappings().first()
+            if row is None:
+                # The row was inserted by a concurrent transaction after our snapshot was taken
+                result = await session.execute(select(users).where(users.c.telegram_id == telegram_id))
+                row = result.mappings().one()
+        return user_cache.put(CachedUser(**row))
+
+    async def get_user(self, telegram_id: int) -> Optional[CachedUser]:
+        cached = user_cache.get(telegram_id)
+        if cached is not None:
+            return cached
+        async with get_read_session() as session:
             result = await session.execute(
                 select(User).filter(User.telegram_id == telegram_id)
             )
             user = result.scalars().first()
-            return user
+            if user is None:
+                return None
+            return user_cache.put(CachedUser.from_model(user))
 
     async def get_all_users(self) -> List[User]:
-        async with get_session() as session:
+        async with get_read_session() as session:
             result = await session.execute(
                 select(User)
             )
             users = result.scalars().all()
             return users
 
-    async def update_user(self, user: User) -> bool:
+    async def iter_users(
+        self,
+        columns: Sequence[str] = ("telegram_id", "wallet_address"),
+        batch_size: int = 1000,
+        after: Optional[int] = None,
+        with_wallet: bool = False,
+    ) -> AsyncIterator[Row]:
+        """
+        Stream users ordered by ``telegram_id``, ``batch_size`` rows per query.
+
+        Only ``columns`` are loaded (``telegram_id`` always is), so scans over
+        addresses never pull keystores. Pages are fetched by keyset, each in its
+        own short read session, which keeps memory flat and no transaction open
+        between batches. ``after`` resumes a scan past the given ``telegram_id``.
+        """
+        selected = [User.telegram_id] + [getattr(User, column) for column in columns if column != "telegram_id"]
+        while True:
+            stmt = select(*selected).order_by(User.telegram_id).limit(batch_size)
+            if after is not None:
+                stmt = stmt.where(User.telegram_id > after)
+            if with_wallet:
+                stmt = stmt.where(User.wallet_address.is_not(None))
+            async with get_read_session() as session:
+                rows = (await session.execute(stmt)).all()
+            for row in rows:
+                yield row
+            if len(rows) < batch_size:
+                return
+            after = rows[-1].telegram_id
+
+    async def update_user(self, user: Union[User, CachedUser]) -> bool:
         async with get_session() as session:
             stmt = (
                 update(User)
@@ -53,9 +116,10 @@ class DbConnector(metaclass=SingletonMeta):
                 .values(username=user.username)
             )
             await session.execute(stmt)
-            return True
+        user_cache.invalidate(user.telegram_id)
+        return True
 
-    async def set_wallet_details(self, user: User, wallet_address: str, keystore: dict) -> bool:
+    async def set_wallet_details(self, user: Union[User, CachedUser], wallet_address: str, keystore: dict) -> bool:
         async with get_session() as session:
             stmt = (
                 update(User)
@@ -63,10 +127,11 @@ class DbConnector(metaclass=SingletonMeta):
                 .values(wallet_address=wallet_address, keystore=keystore)
             )
             await session.execute(stmt)
-            return True
+        user_cache.invalidate(user.telegram_id)
+        return True
 
     async def get_contacts(self, telegram_id: int) -> List[Contact]:
-        async with get_session() as session:
+        async with get_read_session() as session:
             result = await session.execute(
                 select(Contact)
                 .where(Contact.telegram_id == telegram_id)
@@ -87,15 +152,10 @@ class DbConnector(metaclass=SingletonMeta):
 
     @staticmethod
     async def add_message(telegram_id: int, content: str, role: str, mtype: str) -> None:
-        async with get_session() as session:
-            stmt = (
-                insert(Message)
-                .values(
-                    telegram_id=telegram_id,
-                    content=content,
-                    role=role,
-                    mtype=mtype
-                )
-            )
-            await session.execute(stmt)
-            await session.commit()
+        """Queue an audit row, it is written in the background by ``message_sink``."""
+        await message_sink.put(
+            telegram_id=telegram_id,
+            content=content,
+            role=role,
+            mtype=mtype
+        )
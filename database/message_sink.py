@@ -0,0 +1,95 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from configuration import MESSAGE_SINK_QUEUE_SIZE, MESSAGE_SINK_BATCH_SIZE, MESSAGE_SINK_FLUSH_INTERVAL
+from database.base import get_session
+from database.models.gpt import Message
+from services.singleton import SingletonMeta
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class MessageSink(metaclass=SingletonMeta):
+    """
+    Background writer for the ``messages`` audit table.
+
+    Rows are queued in memory and written in multi-row INSERTs once
+    ``batch_size`` rows are waiting or ``flush_interval`` seconds have passed.
+    ``put`` blocks while the queue is full, which throttles producers instead
+    of letting the backlog grow without bound.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = MESSAGE_SINK_QUEUE_SIZE,
+        batch_size: int = MESSAGE_SINK_BATCH_SIZE,
+        flush_interval: float = MESSAGE_SINK_FLUSH_INTERVAL,
+        max_attempts: int = 3,
+    ):
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def _ensure_started(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        return self._queue
+
+    async def put(self, **row: Any) -> None:
+        await self._ensure_started().put(row)
+
+    async def _next_batch(self) -> List[Any]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size and batch[-1] is not _STOP:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch = await self._next_batch()
+            if batch[-1] is _STOP:
+                batch.pop()
+                stopping = True
+            if batch:
+                await self._flush(batch)
+
+    async def _flush(self, rows: List[Dict[str, Any]]) -> None:
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                async with get_session() as session:
+                    await session.execute(insert(Message), rows)
+                return
+            except Exception as e:
+                logger.warning(f"Failed to write {len(rows)} messages (attempt {attempt}): {e}")
+                await asyncio.sleep(attempt)
+        logger.error(f"Dropped {len(rows)} messages after {self.max_attempts} attempts")
+
+    async def close(self) -> None:
+        """Flush everything still queued and stop the background writer."""
+        if self._worker is None or self._worker.done():
+            return
+        await self._queue.put(_STOP)
+        await self._worker
+        self._worker = None
+
+
+message_sink = MessageSink()
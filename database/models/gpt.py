@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import BigInteger, String, Integer, ForeignKey, DateTime, Text
+from sqlalchemy import BigInteger, String, Integer, ForeignKey, DateTime, Text, Index
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql import func
 
@@ -9,6 +9,9 @@ from database.base import Base
 
 class Message(Base):
     __tablename__ = 'messages'
+    __table_args__ = (
+        Index('ix_messages_telegram_id_created_at', 'telegram_id', 'created_at'),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     telegram_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('users.telegram_id', ondelete="CASCADE"),
                                              nullable=False)
@@ -29,6 +29,9 @@ class User(Base):
 
 class Contact(Base):
     __tablename__ = 'contacts'
+    __table_args__ = (
+        sa.Index('ix_contacts_telegram_id_contact_name', 'telegram_id', 'contact_name'),
+    )
     id: Mapped[int] = mapped_column(sa.Integer, primary_key=True, autoincrement=True)
     telegram_id: Mapped[int] = mapped_column(sa.BigInteger())
     contact_name: Mapped[str]
@@ -0,0 +1,79 @@
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from configuration import USER_CACHE_TTL, USER_CACHE_SIZE
+from database.models.user import User
+
+
+class CachedUser:
+    """
+    Detached, lightweight copy of a ``users`` row that is safe to share between handlers.
+    """
+
+    __slots__ = ("telegram_id", "username", "phone_number", "wallet_address", "keystore")
+
+    def __init__(
+        self,
+        telegram_id: int,
+        username: Optional[str] = None,
+        phone_number: Optional[str] = None,
+        wallet_address: Optional[str] = None,
+        keystore: Optional[dict] = None,
+    ):
+        self.telegram_id = telegram_id
+        self.username = username
+        self.phone_number = phone_number
+        self.wallet_address = wallet_address
+        self.keystore = keystore
+
+    @classmethod
+    def from_model(cls, user: User) -> "CachedUser":
+        return cls(
+            telegram_id=user.telegram_id,
+            username=user.username,
+            phone_number=user.phone_number,
+            wallet_address=user.wallet_address,
+            keystore=user.keystore,
+        )
+
+    def __repr__(self):
+        return f'< Username: {self.username}, Telegram Id: {self.telegram_id} >'
+
+
+class UserCache:
+    """
+    Per-process LRU cache of users with a time-to-live per entry.
+    """
+
+    def __init__(self, ttl: int = USER_CACHE_TTL, max_size: int = USER_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, Tuple[CachedUser, float]]" = OrderedDict()
+
+    def get(self, telegram_id: int) -> Optional[CachedUser]:
+        entry = self._entries.get(telegram_id)
+        if entry is None:
+            return None
+        user, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[telegram_id]
+            return None
+        self._entries.move_to_end(telegram_id)
+        return user
+
+    def put(self, user: CachedUser) -> CachedUser:
+        self._entries[user.telegram_id] = (user, time.monotonic() + self.ttl)
+        self._entries.move_to_end(user.telegram_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return user
+
+    def invalidate(self, telegram_id: int) -> None:
+        self._entries.pop(telegram_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+user_cache = UserCache()
@@ -2,7 +2,7 @@
 require('dotenv').config();
 
 // Polyfill Web Crypto API for dependencies using Node's built-in WebCrypto
-const { webcrypto } = require('crypto');
+const { webcrypto, createHash } = require('crypto');
 globalThis.crypto = webcrypto;
 
 const express = require('express');
@@ -33,12 +33,83 @@ const serializeBigInt = (obj) => {
     return obj;
 };
 
-// In-memory store for multiple client sessions
-const sessions = new Map();
+// In-memory store for multiple client sessions.
+// Map iteration order doubles as LRU order: a session is re-inserted on every use,
+// so the first entry is always the least recently used one.
+const SESSION_IDLE_TIMEOUT_MS = Number(process.env.SESSION_IDLE_TIMEOUT_MS) || 30 * 60 * 1000;
+const MAX_SESSIONS = Number(process.env.MAX_SESSIONS) || 1000;
+const SESSION_SWEEP_INTERVAL_MS = 60 * 1000;
+
+const sessions = new Map();      // sessionId -> { client, keyHash, lastUsed, refs }
+const sessionsByKey = new Map(); // sha256(eth_private_key) -> sessionId
+const pendingLogins = new Map(); // sha256(eth_private_key) -> Promise<sessionId>
+
+const hashKey = (key) => createHash('sha256').update(key.toLowerCase()).digest('hex');
+
+const touchSession = (sessionId) => {
+  const session = sessions.get(sessionId);
+  session.lastUsed = Date.now();
+  sessions.delete(sessionId);
+  sessions.set(sessionId, session);
+  return session;
+};
+
+const evictSession = async (sessionId) => {
+  const session = sessions.get(sessionId);
+  if (!session) return;
+  sessions.delete(sessionId);
+  if (sessionsByKey.get(session.keyHash) === sessionId) {
+    sessionsByKey.delete(session.keyHash);
+  }
+  try {
+    await session.client.logout();
+  } catch (err) {
+    console.error('Evicted session logout error:', err);
+  }
+};
+
+// Every /login holds a reference to the session it returns and /logout gives it back,
+// so a caller logging out never closes the session under another caller with the same key.
+const releaseSession = async (sessionId) => {
+  const session = sessions.get(sessionId);
+  if (!session) return;
+  session.refs -= 1;
+  if (session.refs <= 0) {
+    await evictSession(sessionId);
+  }
+};
+
+const evictIdleSessions = () => {
+  const deadline = Date.now() - SESSION_IDLE_TIMEOUT_MS;
+  for (const [sessionId, session] of sessions) {
+    // Entries are in LRU order, so the first fresh one ends the scan
+    if (session.lastUsed > deadline) break;
+    evictSession(sessionId);
+  }
+};
+
+setInterval(evictIdleSessions, SESSION_SWEEP_INTERVAL_MS).unref();
+
+const createSession = async (eth_private_key, keyHash) => {
+  const client = new IntMaxNodeClient({
+    environment: 'testnet',
+    eth_private_key,
+    l1_rpc_url: process.env.L1_RPC_URL,
+  });
+
+  await client.login();
+  while (sessions.size >= MAX_SESSIONS) {
+    evictSession(sessions.keys().next().value);
+  }
+  const sessionId = uuidv4();
+  sessions.set(sessionId, { client, keyHash, lastUsed: Date.now(), refs: 0 });
+  sessionsByKey.set(keyHash, sessionId);
+  return sessionId;
+};
 
 // Middleware to authenticate session for protected routes
 app.use((req, res, next) => {
-  if (req.path === '/login') return next();
+  if (req.path === '/login' || req.path === '/stats') return next();
 
   const sessionId = req.headers['x-session-id'];
   if (!sessionId || !sessions.has(sessionId)) {
@@ -46,29 +117,36 @@ app.use((req, res, next) => {
   }
 
   // Attach client instance to request
-  req.client = sessions.get(sessionId);
+  req.client = touchSession(sessionId).client;
   next();
 });
 
 // POST /login
 // Body: { eth_private_key: string }
 // Returns: { sessionId, address }
+// Logging in again with the same key returns the existing session and takes another
+// reference to it; the session is closed once every login has logged out.
 app.post('/login', async (req, res) => {
   const { eth_private_key } = req.body;
   if (!eth_private_key) {
     return res.status(400).json({ error: 'eth_private_key is required' });
   }
 
+  const keyHash = hashKey(eth_private_key);
   try {
-    const client = new IntMaxNodeClient({
-      environment: 'testnet',
-      eth_private_key,
-      l1_rpc_url: process.env.L1_RPC_URL,
-    });
-
-    await client.login();
-    const sessionId = uuidv4();
-    sessions.set(sessionId, client);
+    let sessionId = sessionsByKey.get(keyHash);
+    if (!sessionId || !sessions.has(sessionId)) {
+      if (!pendingLogins.has(keyHash)) {
+        pendingLogins.set(
+          keyHash,
+          createSession(eth_private_key, keyHash).finally(() => pendingLogins.delete(keyHash)),
+        );
+      }
+      sessionId = await pendingLogins.get(keyHash);
+    }
+    const session = touchSession(sessionId);
+    session.refs += 1;
+    const { client } = session;
 
     return res.json(serializeBigInt({ sessionId, address: client.address }));
   } catch (err) {
@@ -77,15 +155,25 @@ app.post('/login', async (req, res) => {
   }
 });
 
+// GET /stats
+// Returns: { sessions, maxSessions, idleTimeoutMs, uptime, memory }
+app.get('/stats', (req, res) => {
+  return res.json({
+    sessions: sessions.size,
+    maxSessions: MAX_SESSIONS,
+    idleTimeoutMs: SESSION_IDLE_TIMEOUT_MS,
+    uptime: process.uptime(),
+    memory: process.memoryUsage(),
+  });
+});
+
 // POST /logout
 // Header: x-session-id
 // Returns: { status }
 app.post('/logout', async (req, res) => {
   const sessionId = req.headers['x-session-id'];
   try {
-    const client = sessions.get(sessionId);
-    await client.logout();
-    sessions.delete(sessionId);
+    await releaseSession(sessionId);
     return res.json({ status: 'Logged out' });
   } catch (err) {
     console.error('Logout error:', err);
@@ -8,10 +8,19 @@ from aiogram.fsm.storage.redis import RedisStorage
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums.parse_mode import ParseMode
 
-from bot.middleware.user_base import UserToContextMiddleware, UpdateUsernameMiddleware
+from bot.middleware.user_base import UserToContextMiddleware
 from configuration import BOT_TOKEN
 from bot.routers.main_router import main_router
 from bot.services.redis_client import redis_client
+from bot.services.key_cache import key_cache
+from bot.services.intmax_sessions import intmax_sessions
+from bot.services.web3_pool import web3_pool
+from bot.services.gas_oracle import gas_oracle
+from bot.services.tx_watcher import tx_watcher
+from bot.services.withdrawal_claimer import withdrawal_claimer
+from bot.services.token_registry import token_registry
+from database.message_sink import message_sink
+from services.outbox import outbox
 
 
 async def main() -> None:
@@ -20,11 +29,27 @@ async def main() -> None:
 
     # Register middlewares
     dp.message.middleware(UserToContextMiddleware())
-    dp.message.middleware(UpdateUsernameMiddleware())
 
     bot = Bot(BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
     dp.include_router(main_router)
-    await dp.start_polling(bot)
+    await outbox.start(bot)
+    background = [
+        asyncio.create_task(intmax_sessions.run_reaper()),
+        asyncio.create_task(gas_oracle.run()),
+        asyncio.create_task(tx_watcher.run()),
+        asyncio.create_task(withdrawal_claimer.run()),
+        asyncio.create_task(token_registry.run()),
+    ]
+    try:
+        await dp.start_polling(bot)
+    finally:
+        for task in background:
+            task.cancel()
+        await outbox.close()
+        await intmax_sessions.close()
+        await web3_pool.close()
+        await message_sink.close()
+        key_cache.close()
 
 
 if __name__ == "__main__":
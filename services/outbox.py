@@ -0,0 +1,179 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import List, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramRetryAfter, TelegramForbiddenError, TelegramBadRequest, TelegramNetworkError, TelegramServerError
+)
+
+from bot.services.redis_client import redis_client
+from configuration import OUTBOX_WORKERS, OUTBOX_GLOBAL_RATE, OUTBOX_CHAT_RATE, OUTBOX_MAX_ATTEMPTS
+from database.connector import DbConnector
+from services.singleton import SingletonMeta
+
+logger = logging.getLogger(__name__)
+
+QUEUE_KEY = "outbox:queue"
+PROCESSING_KEY = "outbox:processing"
+# Idle per-chat buckets are full again after a second, so forgetting the oldest ones is harmless
+MAX_CHAT_BUCKETS = 10000
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at ``rate`` tokens per second up to ``capacity``.
+
+    ``acquire`` reserves a token right away, letting the balance go negative,
+    and sleeps until the reservation is covered, so concurrent callers are
+    served in order without a lock.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """Take one token and return how many seconds to wait before using it."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        return max(0.0, -self._tokens / self.rate)
+
+    async def acquire(self) -> None:
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class Outbox(metaclass=SingletonMeta):
+    """
+    Rate-limited delivery of outbound bot messages through a Redis queue.
+
+    Messages are queued in Redis so they survive restarts and are sent by a
+    pool of workers, each message passing a per-chat and a global token bucket.
+    A ``TelegramRetryAfter`` pauses every worker for ``retry_after`` seconds and
+    puts the message back at the head of the queue. Messages being sent are
+    parked in a processing list and returned to the queue on the next start,
+    which assumes a single bot process consumes the queue.
+    """
+
+    def __init__(
+        self,
+        workers: int = OUTBOX_WORKERS,
+        global_rate: float = OUTBOX_GLOBAL_RATE,
+        chat_rate: float = OUTBOX_CHAT_RATE,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+    ):
+        self.workers = workers
+        self.chat_rate = chat_rate
+        self.max_attempts = max_attempts
+        self._global_bucket = TokenBucket(global_rate, capacity=global_rate)
+        self._chat_buckets: OrderedDict[int, TokenBucket] = OrderedDict()
+        self._resume_at = 0.0
+        self._tasks: List[asyncio.Task] = []
+        self._bot: Optional[Bot] = None
+
+    async def send(self, chat_id: int, text: str, **kwargs) -> None:
+        """Queue a message; ``kwargs`` are passed to ``Bot.send_message`` and must be JSON-serializable."""
+        await redis_client.rpush(QUEUE_KEY, self._encode(chat_id, text, kwargs))
+
+    async def broadcast(self, text: str, batch_size: int = 1000, **kwargs) -> int:
+        """Queue ``text`` for every user, streaming them from the database, and return how many were queued."""
+        queued = 0
+        batch = []
+        async for row in DbConnector().iter_users(columns=("telegram_id",), batch_size=batch_size):
+            batch.append(self._encode(row.telegram_id, text, kwargs))
+            if len(batch) == batch_size:
+                await redis_client.rpush(QUEUE_KEY, *batch)
+                queued += len(batch)
+                batch = []
+        if batch:
+            await redis_client.rpush(QUEUE_KEY, *batch)
+            queued += len(batch)
+        logger.info(f"Broadcast queued for {queued} users")
+        return queued
+
+    @staticmethod
+    def _encode(chat_id: int, text: str, kwargs: dict, attempts: int = 0, message_id: Optional[str] = None) -> str:
+        return json.dumps({
+            "id": message_id or uuid.uuid4().hex,
+            "chat_id": chat_id,
+            "text": text,
+            "kwargs": kwargs,
+            "attempts": attempts,
+        })
+
+    async def start(self, bot: Bot) -> None:
+        self._bot = bot
+        recovered = 0
+        while await redis_client.lmove(PROCESSING_KEY, QUEUE_KEY, "RIGHT", "LEFT") is not None:
+            recovered += 1
+        if recovered:
+            logger.info(f"Outbox recovered {recovered} unfinished messages")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate)
+            if len(self._chat_buckets) > MAX_CHAT_BUCKETS:
+                self._chat_buckets.popitem(last=False)
+        else:
+            self._chat_buckets.move_to_end(chat_id)
+        return bucket
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                raw = await redis_client.blmove(QUEUE_KEY, PROCESSING_KEY, timeout=1)
+                if raw is None:
+                    continue
+                await self._deliver(raw)
+                await redis_client.lrem(PROCESSING_KEY, 1, raw)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Outbox worker error: {e!r}")
+                await asyncio.sleep(1)
+
+    async def _deliver(self, raw: str) -> None:
+        message = json.loads(raw)
+        chat_id = message["chat_id"]
+        await self._chat_bucket(chat_id).acquire()
+        await self._global_bucket.acquire()
+        pause = self._resume_at - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+        try:
+            await self._bot.send_message(chat_id=chat_id, text=message["text"], **message["kwargs"])
+        except TelegramRetryAfter as e:
+            logger.warning(f"Flood control, pausing outbox for {e.retry_after}s")
+            self._resume_at = max(self._resume_at, time.monotonic() + e.retry_after)
+            await redis_client.lpush(QUEUE_KEY, raw)
+        except (TelegramForbiddenError, TelegramBadRequest) as e:
+            # Blocked bot, deleted account or a malformed message: retrying cannot help
+            logger.info(f"Dropping message to {chat_id}: {e}")
+        except (TelegramNetworkError, TelegramServerError) as e:
+            attempts = message["attempts"] + 1
+            if attempts >= self.max_attempts:
+                logger.error(f"Giving up on message to {chat_id} after {attempts} attempts: {e}")
+                return
+            await redis_client.rpush(
+                QUEUE_KEY, self._encode(chat_id, message["text"], message["kwargs"], attempts, message["id"]))
+
+
+outbox = Outbox()